@@ -32,7 +32,7 @@ logger = logging.getLogger(__name__)
 
 # Initialize App
 app = Flask(__name__)
-CORS(app, supports_credentials=True)
+CORS(app, supports_credentials=True, expose_headers=['X-Next-Cursor'])
 app.secret_key = os.getenv("SECRET_KEY", "fallback-secret-key")
 
 # Configure JWT
@@ -0,0 +1,36 @@
+# archive_notifications.py
+# Periodic job for NOTIFICATION_ARCHIVE=1 deployments: move notifications read
+# more than READ_NOTIFICATION_TTL_DAYS ago into 'notifications_archive' instead
+# of letting the TTL index delete them (run manage_notification_expiry.py first
+# so that index is dropped). Safe to re-run; an interrupted batch is
+# re-copied with upserts before its originals are deleted.
+import datetime
+from pymongo import ReplaceOne
+from models.Notification import Notification, READ_NOTIFICATION_TTL_DAYS
+from db import create_db
+from flask import Flask
+from dotenv import load_dotenv
+
+BATCH_SIZE = 1000
+ARCHIVE_COLLECTION = "notifications_archive"
+
+load_dotenv()
+
+app = Flask(__name__)
+create_db(app)  # Initialize MongoEngine connection
+
+collection = Notification._get_collection()
+archive = collection.database[ARCHIVE_COLLECTION]
+archive.create_index([("user", 1), ("timestamp", -1)])
+cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=READ_NOTIFICATION_TTL_DAYS)
+
+archived = 0
+while True:
+    batch = list(collection.find({"read": True, "read_at": {"$lt": cutoff}}).limit(BATCH_SIZE))
+    if not batch:
+        break
+    archive.bulk_write([ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in batch], ordered=False)
+    collection.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+    archived += len(batch)
+
+print(f"✅ Archived {archived} read notifications older than {READ_NOTIFICATION_TTL_DAYS} days.")
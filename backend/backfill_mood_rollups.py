@@ -0,0 +1,22 @@
+# backfill_mood_rollups.py
+# Rebuild MoodRollup documents from existing Mood data.
+#   python backfill_mood_rollups.py            # every user
+#   python backfill_mood_rollups.py <user_id>  # a single user
+import sys
+from models.Mood import Mood
+from utils.mood_rollups import rebuild_rollups
+from db import create_db
+from flask import Flask
+from dotenv import load_dotenv
+
+load_dotenv()
+
+app = Flask(__name__)
+create_db(app)  # Initialize MongoEngine connection
+
+user_ids = sys.argv[1:] or Mood.objects.distinct('user_id')
+for user_id in user_ids:
+    rebuild_rollups(user_id)
+    print(f"Rebuilt rollups for user: {user_id}")
+
+print(f"✅ Backfilled mood rollups for {len(user_ids)} user(s).")
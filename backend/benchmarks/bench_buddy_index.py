@@ -0,0 +1,106 @@
+# benchmarks/bench_buddy_index.py
+# Compares the old per-candidate Python set intersection loop from get_buddies
+# with utils.buddy_index.InterestIndex on a synthetic user base.
+#
+#   python benchmarks/bench_buddy_index.py --users 10000 100000
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+
+def synthetic_users(n, vocab=300, seed=0):
+    """Zipf-ish interest popularity, 0-12 interests per user, ~2% non-'user' roles"""
+    rng = np.random.default_rng(seed)
+    names = [f"interest-{i}" for i in range(vocab)]
+    weights = 1.0 / np.arange(1, vocab + 1)
+    weights /= weights.sum()
+    users = []
+    for i in range(n):
+        picks = rng.choice(vocab, size=rng.integers(0, 13), replace=False, p=weights)
+        users.append((f"u{i}", [names[j] for j in picks], rng.random() > 0.02))
+    return users
+
+
+def python_loop(users, me, interests, k):
+    """The original algorithm: rebuild sets per candidate, score, full sort"""
+    scored = []
+    for user_id, theirs, matchable in users:
+        if user_id == me or not matchable:
+            continue
+        my_interests = set(interests or [])
+        scored.append((user_id, len(my_interests.intersection(set(theirs or [])))))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:k]
+
+
+def timed(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    ms = np.array(timings) * 1000
+    return {"mean_ms": round(float(ms.mean()), 3), "p95_ms": round(float(np.percentile(ms, 95)), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buddy recommendation engine benchmark")
+    parser.add_argument("--users", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    from utils.buddy_index import InterestIndex, METRICS
+
+    results = []
+    for n in args.users:
+        users = synthetic_users(n)
+        me, interests, _ = users[0]
+
+        index = InterestIndex()
+        start = time.perf_counter()
+        index.load(users)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for i in range(1000):
+            user_id, theirs, matchable = users[i]
+            index.update_user(user_id, theirs[::-1], matchable)
+        update_us = (time.perf_counter() - start) * 1000
+
+        row = {
+            "users": n,
+            "vocabulary": len(index.vocab),
+            "matrix_mb": round(index.bits.nbytes / 2 ** 20, 2),
+            "build_ms": round(build_ms, 1),
+            "update_user_us": round(update_us, 2),
+            "python_loop": timed(lambda: python_loop(users, me, interests, args.k), args.repeats)
+        }
+        for metric in METRICS:
+            index.top_k(interests, args.k, metric, exclude=[me]) # warm-up
+            row[f"index_{metric}"] = timed(
+                lambda: index.top_k(interests, args.k, metric, exclude=[me]), args.repeats)
+
+        # Same overlap ranking as the loop (ties may be ordered differently)
+        expected = sorted(s for _, s in python_loop(users, me, interests, args.k))
+        got = sorted(o for _, _, o in index.top_k(interests, args.k, 'overlap', exclude=[me]))
+        row["overlap_scores_match"] = expected == got
+        results.append(row)
+
+    report = json.dumps({"benchmark": "buddy_index", "k": args.k, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
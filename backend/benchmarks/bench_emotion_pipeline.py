@@ -0,0 +1,216 @@
+# benchmarks/bench_emotion_pipeline.py
+# Stage-by-stage timings for EmotionDetector.detect and process_video on
+# locally generated media. Results are JSON so runs can be diffed in CI.
+#
+#   python benchmarks/bench_emotion_pipeline.py --output bench_output.json
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import make_frame, make_video, load_face
+
+RESOLUTIONS = {"480p": (640, 480), "720p": (1280, 720), "1080p": (1920, 1080), "4k": (3840, 2160)}
+VIDEO_CASES = [
+    # (name, fps, fourcc, extension)
+    ("mp4_15fps", 15, "mp4v", ".mp4"),
+    ("mp4_30fps", 30, "mp4v", ".mp4"),
+    ("mp4_60fps", 60, "mp4v", ".mp4"),
+    # Browser recordings: OpenCV usually reports 0 or 1000 FPS for these
+    ("webm_bad_fps", 30, "VP80", ".webm"),
+]
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+
+    def summary(self):
+        out = {}
+        for stage, values in self.samples.items():
+            ms = np.array(values) * 1000
+            out[stage] = {
+                "calls": len(values),
+                "total_ms": round(float(ms.sum()), 3),
+                "mean_ms": round(float(ms.mean()), 3),
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(ms, 95)), 3)
+            }
+        return out
+
+
+def _run_stages(detector, frame, timer):
+    """detect face -> preprocess -> infer, each timed; returns True if a face was found"""
+    with timer.time("face_detection"):
+        box = detector._detect_face(frame)
+    if box is None:
+        return False
+    with timer.time("preprocess"):
+        face = detector._preprocess(frame, box)
+    if getattr(detector, "model", None) is not None:
+        batch = np.expand_dims(face, axis=0)
+        with timer.time("inference"):
+            detector._infer(batch)
+    return True
+
+
+def bench_snapshot(detector, name, size, face, image_format, repeats):
+    ok, encoded = cv2.imencode(image_format, make_frame(size[0], size[1], 0, face))
+    payload = encoded.tobytes()
+
+    timer = StageTimer()
+    faces_found = 0
+    for _ in range(repeats):
+        with timer.time("total"):
+            with timer.time("decode"):
+                frame = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+            faces_found += _run_stages(detector, frame, timer)
+
+    # End-to-end through the public API for comparison with the stage sum
+    e2e = StageTimer()
+    if getattr(detector, "model", None) is not None or not faces_found:
+        for _ in range(repeats):
+            with e2e.time("detect"):
+                detector.detect(io.BytesIO(payload))
+
+    return {
+        "case": name,
+        "width": size[0],
+        "height": size[1],
+        "format": image_format,
+        "payload_bytes": len(payload),
+        "face": bool(face),
+        "faces_found": faces_found,
+        "repeats": repeats,
+        "stages": timer.summary(),
+        "end_to_end": e2e.summary()
+    }
+
+
+def bench_video(detector, name, seconds, fps, fourcc, ext, face):
+    fd, path = tempfile.mkstemp(suffix=ext)
+    os.close(fd)
+    try:
+        try:
+            make_video(path, seconds, fps, face=face, fourcc=fourcc)
+        except RuntimeError as e:
+            return {"case": name, "skipped": str(e)}
+
+        cap = cv2.VideoCapture(path)
+        reported_fps = cap.get(cv2.CAP_PROP_FPS)
+        # Same FPS fallback and default sampling step as process_video
+        from utils.emotion_model import DEFAULT_SAMPLING
+        effective_fps = reported_fps if 0 < reported_fps <= 120 else 30
+        _, interval = detector._sampling_steps(effective_fps, DEFAULT_SAMPLING)
+
+        timer = StageTimer()
+        frame_count = 0
+        sampled = 0
+        faces_found = 0
+        with timer.time("total"):
+            while True:
+                if frame_count % interval == 0:
+                    with timer.time("decode"):
+                        ret, frame = cap.read()
+                    if not ret:
+                        break
+                    sampled += 1
+                    faces_found += _run_stages(detector, frame, timer)
+                else:
+                    with timer.time("decode_skipped"):
+                        ret = cap.grab()
+                    if not ret:
+                        break
+                frame_count += 1
+        cap.release()
+
+        e2e = StageTimer()
+        if getattr(detector, "model", None) is not None or not faces_found:
+            with e2e.time("process_video"):
+                detector.process_video(path)
+
+        return {
+            "case": name,
+            "seconds": seconds,
+            "fps_written": fps,
+            "fps_reported": reported_fps,
+            "fps_effective": effective_fps,
+            "sample_step": interval,
+            "frames": frame_count,
+            "sampled_frames": sampled,
+            "face": bool(face),
+            "faces_found": faces_found,
+            "stages": timer.summary(),
+            "end_to_end": e2e.summary()
+        }
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EmotionDetector stage benchmarks")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--video-seconds", type=int, default=10)
+    parser.add_argument("--face-image", help="Optional face photo pasted into frames")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    from utils.emotion_model import detector
+
+    face = load_face(args.face_image)
+    snapshots = []
+    for res_name, size in RESOLUTIONS.items():
+        for with_face in (False, True):
+            for image_format in (".jpg", ".png"):
+                case = f"{res_name}_{'face' if with_face else 'noface'}_{image_format[1:]}"
+                snapshots.append(bench_snapshot(
+                    detector, case, size, face if with_face else None, image_format, args.repeats
+                ))
+
+    videos = []
+    for name, fps, fourcc, ext in VIDEO_CASES:
+        for with_face in (False, True):
+            case = f"{name}_{'face' if with_face else 'noface'}"
+            videos.append(bench_video(
+                detector, case, args.video_seconds, fps, fourcc, ext, face if with_face else None
+            ))
+
+    report = json.dumps({
+        "benchmark": "emotion_pipeline",
+        "environment": {
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+            "model_loaded": getattr(detector, "model", None) is not None
+        },
+        "detect": snapshots,
+        "process_video": videos
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/bench_friend_roundtrips.py
+# Mongo round trips and reply bytes for the friend endpoints' data access,
+# old (iterate the legacy User ReferenceField lists) vs new (Friendship edges
+# via utils/friends.py), for a user with --friends accepted friends and as many
+# pending requests.
+#
+# Needs a MongoDB: seeds throwaway users (bench-*@example.invalid) into the
+# database at MONGODB_URI and deletes them afterwards. Point it at a scratch DB.
+#
+#   MONGODB_URI=mongodb://localhost:27017/bench python benchmarks/bench_friend_roundtrips.py
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bson
+from bson import ObjectId
+from pymongo import monitoring
+
+EMAIL_DOMAIN = "@example.invalid"
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.commands = 0
+        self.reply_bytes = 0
+
+    def started(self, event):
+        if event.command_name not in ("isMaster", "hello", "ping", "endSessions"):
+            self.commands += 1
+
+    def succeeded(self, event):
+        if event.command_name not in ("isMaster", "hello", "ping", "endSessions"):
+            self.reply_bytes += len(bson.encode(event.reply))
+
+    def failed(self, event):
+        pass
+
+
+def seed(User, friends):
+    """One user with `friends` friends and `friends` pending requests, stored both
+    ways (legacy arrays and edges) -> (user id, other ids)"""
+    me = ObjectId()
+    others = [ObjectId() for _ in range(friends * 2)]
+    docs = [{
+        "_id": oid, "name": f"Bench {i}", "email": f"bench-{oid}{EMAIL_DOMAIN}", "password": "x",
+        "role": "user", "bio": "lorem ipsum " * 20, "interests": ["reading", "music", "hiking"],
+        "friends": [me] if i < friends else [], "friend_requests_sent": [me] if i >= friends else []
+    } for i, oid in enumerate(others)]
+    docs.append({
+        "_id": me, "name": "Bench Me", "email": f"bench-{me}{EMAIL_DOMAIN}", "password": "x", "role": "user",
+        "friends": others[:friends], "friend_requests_received": others[friends:]
+    })
+    User._get_collection().insert_many(docs)
+
+    import datetime
+    from models.Friendship import Friendship
+    from utils.friends import FRIEND, RECEIVED, edge_upserts
+    now = datetime.datetime.utcnow()
+    ops = []
+    for i, oid in enumerate(others):
+        ops += edge_upserts(me, oid, FRIEND if i < friends else RECEIVED, now)
+    Friendship._get_collection().bulk_write(ops)
+    return me, others
+
+
+def old_get_friends(User, me):
+    user = User.objects(id=me).first()
+    return [(u.id, u.name, u.age, u.location, u.bio, u.interests, u.status) for u in user.friends]
+
+
+def old_get_friend_requests(User, me):
+    user = User.objects(id=me).first()
+    return [(u.id, u.name, u.bio, u.avatar_seed) for u in user.friend_requests_received]
+
+
+def old_is_friend(User, me, other):
+    sender = User.objects(id=me).first()
+    return other in [friend.id for friend in sender.friends]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Friend list round-trip benchmark")
+    parser.add_argument("--friends", type=int, default=500)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from mongoengine import connect
+    load_dotenv()
+    counter = CommandCounter()
+    connect(host=os.getenv("MONGODB_URI"), alias="default", event_listeners=[counter])
+
+    from models.User import User
+    from models.Friendship import Friendship
+    from utils.friends import FRIEND, RECEIVED, are_friends, edge_page
+
+    me, others = seed(User, args.friends)
+    target = others[args.friends - 1]
+    cases = {
+        "get_friends": (
+            lambda: old_get_friends(User, me),
+            lambda: edge_page(me, FRIEND, args.friends)),
+        "get_friend_requests": (
+            lambda: old_get_friend_requests(User, me),
+            lambda: edge_page(me, RECEIVED, args.friends, fields=('name', 'bio', 'avatar_seed'))),
+        "friend_membership_check": (
+            lambda: old_is_friend(User, me, target),
+            lambda: are_friends(me, target))
+    }
+
+    results = []
+    try:
+        for name, (old, new) in cases.items():
+            row = {"case": name}
+            for label, fn in (("before", old), ("after", new)):
+                counter.reset()
+                fn()
+                row[label] = {"round_trips": counter.commands, "reply_kb": round(counter.reply_bytes / 1024, 1)}
+            results.append(row)
+    finally:
+        User._get_collection().delete_many({"email": {"$regex": f"^bench-.*{EMAIL_DOMAIN}$"}})
+        ids = [me] + others
+        Friendship._get_collection().delete_many({"user": {"$in": ids}})
+
+    report = json.dumps({"benchmark": "friend_roundtrips", "friends": args.friends, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
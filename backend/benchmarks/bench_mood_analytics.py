@@ -0,0 +1,71 @@
+# benchmarks/bench_mood_analytics.py
+# Times utils.mood_analytics.analyze over synthetic multi-year daily mood data.
+#
+#   python benchmarks/bench_mood_analytics.py --years 1 3 5 10
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+ACTIVITIES = ['exercise', 'work', 'social', 'sleep', 'meditation', 'reading', 'family', 'outdoors', 'gaming', 'music']
+
+
+def synthetic_series(years, seed=0):
+    """Daily moods with a weekly rhythm, a slow drift, skipped days and activity effects"""
+    rng = np.random.default_rng(seed)
+    days = int(years * 365)
+    start = np.datetime64(datetime.date.today() - datetime.timedelta(days=days), 'D')
+    dates = start + np.arange(days)
+    dates = dates[rng.random(days) > 0.1] # ~10% of days not logged
+
+    picks = rng.random((len(dates), len(ACTIVITIES))) < 0.3
+    activities = [[ACTIVITIES[j] for j in np.flatnonzero(row)] for row in picks]
+    effect = picks @ np.linspace(0.6, -0.4, len(ACTIVITIES))
+    weekday = (dates.astype(np.int64) + 3) % 7
+    base = 3 + 0.3 * (weekday >= 5) + np.linspace(-0.3, 0.3, len(dates)) + effect
+    moods = np.clip(np.rint(base + rng.normal(0, 0.7, len(dates))), 1, 5).astype(np.int8)
+    return dates, moods, activities
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mood analytics engine benchmark")
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    from utils.mood_analytics import analyze
+
+    results = []
+    for years in args.years:
+        dates, moods, activities = synthetic_series(years)
+        analyze(dates, moods, activities) # warm-up
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            analyze(dates, moods, activities)
+            timings.append(time.perf_counter() - start)
+        ms = np.array(timings) * 1000
+        results.append({
+            "years": years,
+            "entries": int(len(moods)),
+            "mean_ms": round(float(ms.mean()), 3),
+            "p95_ms": round(float(np.percentile(ms, 95)), 3)
+        })
+
+    report = json.dumps({"benchmark": "mood_analytics", "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
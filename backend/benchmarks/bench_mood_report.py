@@ -0,0 +1,73 @@
+# benchmarks/bench_mood_report.py
+# PDF generation time, size and peak Python memory for 1 month vs 2 years of moods.
+#
+#   python benchmarks/bench_mood_report.py
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_mood_analytics import synthetic_series
+
+RANGES = {"1_month": 30 / 365, "2_years": 2}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mood PDF report benchmark")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    from utils.mood_report import render_mood_report
+
+    # Warm-up: font and module loading should not be billed to the first case
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    render_mood_report(path, "Warm-up", datetime.date.today(), datetime.date.today(), [], "week", [])
+    os.remove(path)
+
+    results = []
+    for name, years in RANGES.items():
+        dates, moods, activities = synthetic_series(years)
+        days = [d.item() for d in dates]
+        rows = list(zip(days, (int(m) for m in moods), activities))
+        # Weekly averages stand in for the MoodRollup chart points
+        weeks = {}
+        for day, mood, _ in rows:
+            weeks.setdefault(day - datetime.timedelta(days=day.weekday()), []).append(mood)
+        points = [(week, sum(v) / len(v)) for week, v in sorted(weeks.items())]
+
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        try:
+            tracemalloc.start()
+            start = time.perf_counter()
+            render_mood_report(path, "Benchmark User", days[0], days[-1], iter(rows), "week", points)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append({
+                "range": name,
+                "entries": len(rows),
+                "seconds": round(elapsed, 4),
+                "pdf_bytes": os.path.getsize(path),
+                "peak_traced_bytes": peak
+            })
+        finally:
+            os.remove(path)
+
+    report = json.dumps({"benchmark": "mood_report", "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
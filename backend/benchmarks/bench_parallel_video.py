@@ -0,0 +1,68 @@
+# benchmarks/bench_parallel_video.py
+# Measures how process_video scales from 1 to N worker processes.
+#
+#   python benchmarks/bench_parallel_video.py --seconds 120 --max-workers 8
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_video, load_face
+
+
+def main():
+    parser = argparse.ArgumentParser(description="process_video worker scaling")
+    parser.add_argument("--seconds", type=int, default=120)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--face-image", help="Optional face photo pasted into every frame")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    from utils import emotion_model
+    detector = emotion_model.detector
+
+    fd, path = tempfile.mkstemp(suffix=".mp4")
+    os.close(fd)
+    try:
+        make_video(path, args.seconds, args.fps, face=load_face(args.face_image))
+
+        # Warm the pool so worker start-up (model load) is not billed to the first run
+        detector.process_video(path, workers=args.max_workers)
+
+        results = []
+        baseline = None
+        for workers in range(1, args.max_workers + 1):
+            start = time.perf_counter()
+            timeline = detector.process_video(path, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            results.append({
+                "workers": workers,
+                "seconds": round(elapsed, 4),
+                "speedup": round(baseline / elapsed, 2),
+                "timeline_points": len(timeline)
+            })
+    finally:
+        os.remove(path)
+
+    report = json.dumps({
+        "benchmark": "parallel_video",
+        "video_seconds": args.seconds,
+        "fps": args.fps,
+        "max_video_workers": emotion_model.MAX_VIDEO_WORKERS,
+        "results": results
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
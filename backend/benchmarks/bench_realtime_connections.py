@@ -0,0 +1,107 @@
+# benchmarks/bench_realtime_connections.py
+# Scales the in-process push broker (utils/realtime.py) by open connections:
+# memory per subscription, per-user publish cost, group broadcast fan-out and
+# publish-to-delivery latency with live consumer threads.
+#
+#   python benchmarks/bench_realtime_connections.py --connections 100 1000 10000
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+POLL_ENDPOINTS = 2 # unread-count endpoints the page used to poll per tab
+
+
+def measure(n, consumers, poll_seconds):
+    from utils.realtime import LocalBroker, user_topic, group_topic
+
+    broker = LocalBroker()
+    tracemalloc.start()
+    base = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    subs = [broker.subscribe([user_topic(i), group_topic("circle")]) for i in range(n)]
+    subscribe_s = time.perf_counter() - start
+    used = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(base, "filename"))
+    tracemalloc.stop()
+    assert broker.connection_count() == n
+
+    # One direct event per user
+    start = time.perf_counter()
+    for i in range(n):
+        broker.publish(user_topic(i), "counts", {"notifications": 1, "messages": 0})
+    per_user_us = (time.perf_counter() - start) / n * 1e6
+
+    # One group message to everyone
+    start = time.perf_counter()
+    broker.publish(group_topic("circle"), "group_message", {"message": "hi"})
+    broadcast_ms = (time.perf_counter() - start) * 1000
+    for sub in subs:
+        while not sub.events.empty():
+            sub.events.get_nowait()
+
+    # Delivery latency: `consumers` threads blocked on their queues, as streams are
+    latencies = []
+    lock = threading.Lock()
+
+    def consume(sub, events):
+        for _ in range(events):
+            message = sub.get(timeout=10)
+            delay = time.perf_counter() - message["data"]["sent"]
+            with lock:
+                latencies.append(delay)
+
+    rounds = 20
+    live = subs[:consumers]
+    threads = [threading.Thread(target=consume, args=(sub, rounds), daemon=True) for sub in live]
+    for t in threads:
+        t.start()
+    for _ in range(rounds):
+        broker.publish(group_topic("circle"), "group_message", {"sent": time.perf_counter()})
+        time.sleep(0.01)
+    for t in threads:
+        t.join()
+
+    for sub in subs:
+        sub.close()
+    ms = np.array(latencies) * 1000
+    return {
+        "connections": n,
+        "subscribe_us_each": round(subscribe_s / n * 1e6, 2),
+        "memory_kb_each": round(used / n / 1024, 2),
+        "publish_to_user_us": round(per_user_us, 2),
+        "group_broadcast_ms": round(broadcast_ms, 3),
+        "live_consumers": len(live),
+        "delivery_p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "delivery_p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "polling_requests_per_min_avoided": int(n * POLL_ENDPOINTS * 60 / poll_seconds),
+        "connections_left": broker.connection_count()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Realtime push broker benchmark")
+    parser.add_argument("--connections", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--consumers", type=int, default=200, help="Live consumer threads per run")
+    parser.add_argument("--poll-seconds", type=float, default=10, help="Polling interval being replaced")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    results = [measure(n, min(n, args.consumers), args.poll_seconds) for n in args.connections]
+
+    report = json.dumps({"benchmark": "realtime_connections", "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
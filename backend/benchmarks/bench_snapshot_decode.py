@@ -0,0 +1,80 @@
+# benchmarks/bench_snapshot_decode.py
+# Per-request latency and peak memory of the snapshot decode path,
+# comparing the old full-resolution decode with EmotionDetector._decode_snapshot.
+#
+#   python benchmarks/bench_snapshot_decode.py --repeats 30
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import make_frame
+
+SIZES = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+
+
+def full_decode(payload):
+    """The pre-optimization path: read() into bytes, then decode at native size"""
+    nparr = np.frombuffer(io.BytesIO(payload).read(), np.uint8)
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+def measure(fn, payload, repeats):
+    latencies = []
+    peaks = []
+    shape = None
+    for _ in range(repeats):
+        tracemalloc.start()
+        start = time.perf_counter()
+        frame = fn(payload)
+        latencies.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        shape = frame.shape
+        del frame
+    ms = np.array(latencies) * 1000
+    return {
+        "decoded_shape": list(shape),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "peak_traced_bytes": int(max(peaks))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot decode latency/memory")
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    from utils.emotion_model import detector
+
+    results = []
+    for name, (width, height) in SIZES.items():
+        ok, encoded = cv2.imencode(".jpg", make_frame(width, height, 0, True), [cv2.IMWRITE_JPEG_QUALITY, 90])
+        payload = encoded.tobytes()
+        results.append({
+            "case": name,
+            "payload_bytes": len(payload),
+            "full_decode": measure(full_decode, payload, args.repeats),
+            "reduced_decode": measure(lambda p: detector._decode_snapshot(io.BytesIO(p))[0], payload, args.repeats)
+        })
+
+    report = json.dumps({"benchmark": "snapshot_decode", "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
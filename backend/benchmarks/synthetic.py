@@ -0,0 +1,53 @@
+# benchmarks/synthetic.py
+# Generates test media locally so benchmarks never depend on user uploads.
+import cv2
+import numpy as np
+
+
+def make_frame(width, height, index=0, face=None):
+    """A noisy background frame, optionally with a face pasted in the middle.
+
+    face is either None, a BGR image (pasted as-is) or True for a drawn cartoon face.
+    """
+    rng = np.random.default_rng(index)
+    frame = rng.integers(0, 60, size=(height, width, 3), dtype=np.uint8)
+    # Slow-moving gradient so consecutive frames are not identical for the codec
+    cv2.rectangle(frame, (index % width, 0), ((index % width) + width // 8, height), (90, 90, 90), -1)
+
+    if face is None or face is False:
+        return frame
+
+    size = min(width, height) // 2
+    x, y = (width - size) // 2, (height - size) // 2
+    if face is True:
+        cv2.ellipse(frame, (x + size // 2, y + size // 2), (size // 2 - 4, size // 2), 0, 0, 360, (150, 180, 220), -1)
+        cv2.circle(frame, (x + size // 3, y + size // 3), size // 12, (40, 40, 40), -1)
+        cv2.circle(frame, (x + 2 * size // 3, y + size // 3), size // 12, (40, 40, 40), -1)
+        cv2.ellipse(frame, (x + size // 2, y + 2 * size // 3), (size // 5, size // 10), 0, 0, 180, (60, 60, 150), 3)
+    else:
+        frame[y:y + size, x:x + size] = cv2.resize(face, (size, size))
+    return frame
+
+
+def make_video(path, seconds, fps=30, size=(640, 480), face=None, fourcc="mp4v"):
+    """Write a synthetic video and return its path."""
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"OpenCV cannot write {fourcc} video to {path}")
+    try:
+        for i in range(int(seconds * fps)):
+            writer.write(make_frame(width, height, i, face))
+    finally:
+        writer.release()
+    return path
+
+
+def load_face(path):
+    """Read an optional real face photo for more realistic cascade workloads."""
+    if not path:
+        return True
+    face = cv2.imread(path, cv2.IMREAD_COLOR)
+    if face is None:
+        raise FileNotFoundError(path)
+    return face
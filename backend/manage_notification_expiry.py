@@ -0,0 +1,46 @@
+# manage_notification_expiry.py
+# Bring the read-notification TTL index in line with the environment:
+#   NOTIFICATION_ARCHIVE=1         -> drop the TTL index (archive_notifications.py takes over)
+#   READ_NOTIFICATION_TTL_DAYS=N   -> create it, or collMod its expireAfterSeconds
+# Run on deploy and after changing either setting. Safe to re-run.
+from models.Notification import Notification, READ_NOTIFICATION_TTL_DAYS, ARCHIVE_READ_NOTIFICATIONS
+from db import create_db
+from flask import Flask
+from dotenv import load_dotenv
+
+TTL_INDEX_NAME = "read_at_ttl"
+
+load_dotenv()
+
+app = Flask(__name__)
+create_db(app)  # Initialize MongoEngine connection
+
+collection = Notification._get_collection()
+expire_after = READ_NOTIFICATION_TTL_DAYS * 86400
+
+# Any index on read_at alone counts, including one created under another name
+existing_name, existing = next(
+    ((name, info) for name, info in collection.index_information().items() if info["key"] == [("read_at", 1)]),
+    (None, None)
+)
+
+if ARCHIVE_READ_NOTIFICATIONS:
+    if existing_name:
+        collection.drop_index(existing_name)
+        print(f"✅ Dropped TTL index '{existing_name}'; schedule archive_notifications.py.")
+    else:
+        print("✅ No TTL index; read notifications are archived by archive_notifications.py.")
+elif existing is not None and existing.get("expireAfterSeconds") == expire_after:
+    print(f"✅ TTL index already expires read notifications after {READ_NOTIFICATION_TTL_DAYS} days.")
+elif existing is not None and "expireAfterSeconds" in existing:
+    collection.database.command(
+        "collMod", collection.name,
+        index={"name": existing_name, "expireAfterSeconds": expire_after}
+    )
+    print(f"✅ TTL index '{existing_name}' now expires read notifications after {READ_NOTIFICATION_TTL_DAYS} days.")
+else:
+    if existing_name: # A plain read_at index cannot be turned into a TTL index in place
+        collection.drop_index(existing_name)
+    # Unread notifications have no read_at, so only read ones ever expire
+    collection.create_index([("read_at", 1)], name=TTL_INDEX_NAME, expireAfterSeconds=expire_after)
+    print(f"✅ Created TTL index: read notifications expire after {READ_NOTIFICATION_TTL_DAYS} days.")
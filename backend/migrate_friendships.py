@@ -0,0 +1,54 @@
+# migrate_friendships.py
+# One-off migration: move User.friends / friend_requests_sent /
+# friend_requests_received into the Friendship edge collection and drop the
+# arrays from the user documents.
+# Safe to re-run; users already migrated have no arrays left to read.
+import datetime
+from models.User import User
+from models.Friendship import Friendship
+from utils.friends import FRIEND, SENT, RECEIVED, edge_upserts
+from db import create_db
+from flask import Flask
+from dotenv import load_dotenv
+
+BATCH_SIZE = 500
+LEGACY_FIELDS = {'friends': FRIEND, 'friend_requests_sent': SENT, 'friend_requests_received': RECEIVED}
+
+load_dotenv()
+
+app = Flask(__name__)
+create_db(app)  # Initialize MongoEngine connection
+
+users = User._get_collection()
+edges = Friendship._get_collection()
+Friendship.ensure_indexes()
+now = datetime.datetime.utcnow()
+
+cursor = users.find(
+    {"$or": [{field: {"$exists": True}} for field in LEGACY_FIELDS]},
+    {field: 1 for field in LEGACY_FIELDS}
+)
+
+ops = []
+migrated = edge_count = 0
+for doc in cursor:
+    for field, status in LEGACY_FIELDS.items():
+        for other in doc.get(field) or []:
+            if other == doc["_id"]:
+                continue
+            ops += edge_upserts(doc["_id"], other, status, now)
+    # Order does not matter: friend edges $set, pending edges only $setOnInsert
+    if len(ops) >= BATCH_SIZE:
+        result = edges.bulk_write(ops, ordered=True)
+        edge_count += result.upserted_count + result.modified_count
+        ops = []
+    migrated += 1
+
+if ops:
+    result = edges.bulk_write(ops, ordered=True)
+    edge_count += result.upserted_count + result.modified_count
+
+# Only now that every edge is written, shrink the user documents
+users.update_many({}, {"$unset": {field: "" for field in LEGACY_FIELDS}})
+
+print(f"✅ Migrated relationships of {migrated} users ({edge_count} edges written).")
@@ -0,0 +1,46 @@
+# migrate_journal_timelines.py
+# One-off migration: convert legacy JournalEntry.timeline lists into the
+# compact run-length form (timeline_compact) and drop the old list.
+# Safe to re-run; entries already migrated are skipped.
+from pymongo import UpdateOne
+from models.JournalEntry import JournalEntry
+from utils.timeline_codec import encode_timeline
+from db import create_db
+from flask import Flask
+from dotenv import load_dotenv
+
+BATCH_SIZE = 500
+
+load_dotenv()
+
+app = Flask(__name__)
+create_db(app)  # Initialize MongoEngine connection
+
+collection = JournalEntry._get_collection()
+cursor = collection.find(
+    {"timeline.0": {"$exists": True}, "timeline_compact": {"$exists": False}},
+    {"timeline": 1}
+)
+
+ops = []
+migrated = skipped = 0
+for doc in cursor:
+    try:
+        compact = encode_timeline(doc["timeline"])
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"⚠️ Skipping entry {doc['_id']}: {e}")
+        skipped += 1
+        continue
+
+    ops.append(UpdateOne(
+        {"_id": doc["_id"]},
+        {"$set": {"timeline_compact": compact}, "$unset": {"timeline": ""}}
+    ))
+    if len(ops) >= BATCH_SIZE:
+        migrated += collection.bulk_write(ops, ordered=False).modified_count
+        ops = []
+
+if ops:
+    migrated += collection.bulk_write(ops, ordered=False).modified_count
+
+print(f"✅ Migrated {migrated} journal entries ({skipped} skipped).")
@@ -0,0 +1,51 @@
+# migrate_message_digests.py
+# One-off migration for coalesced message notifications: merge the unread
+# 'message' notifications each reader has from the same sender into one digest
+# (newest row kept, counts summed), then create the partial unique index that
+# keeps concurrent first messages from inserting two digests.
+# Safe to re-run; run it before (or right after) deploying the digest code.
+from models.Notification import Notification
+from utils.notification_digest import DIGEST_INDEX_NAME, DIGEST_INDEX_KEYS, DIGEST_INDEX_FILTER
+from utils.unread_counters import reconcile
+from db import create_db
+from flask import Flask
+from dotenv import load_dotenv
+
+load_dotenv()
+
+app = Flask(__name__)
+create_db(app)  # Initialize MongoEngine connection
+
+collection = Notification._get_collection()
+duplicates = collection.aggregate([
+    {"$match": DIGEST_INDEX_FILTER},
+    {"$sort": {"timestamp": -1, "_id": -1}},
+    {"$group": {
+        "_id": {"user": "$user", "sender": "$metadata.sender_id"},
+        "ids": {"$push": "$_id"},
+        "count": {"$sum": {"$ifNull": ["$count", 1]}},
+        "sender_name": {"$first": "$metadata.sender_name"}
+    }},
+    {"$match": {"ids.1": {"$exists": True}}}
+], allowDiskUse=True)
+
+merged = removed = 0
+users = set()
+for group in duplicates:
+    keep, *rest = group["ids"]
+    collection.update_one({"_id": keep}, {"$set": {
+        "count": group["count"],
+        "message": f"{group['count']} new messages from {group['sender_name']}"
+    }})
+    removed += collection.delete_many({"_id": {"$in": rest}}).deleted_count
+    users.add(group["_id"]["user"])
+    merged += 1
+
+if users:
+    reconcile(list(users)) # Unread notification counts dropped with the merged rows
+print(f"✅ Merged {removed} duplicate message notifications into {merged} digests.")
+
+collection.create_index(
+    DIGEST_INDEX_KEYS, name=DIGEST_INDEX_NAME, unique=True, partialFilterExpression=DIGEST_INDEX_FILTER
+)
+print(f"✅ Unique index '{DIGEST_INDEX_NAME}' ensures one unread digest per sender.")
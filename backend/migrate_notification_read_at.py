@@ -0,0 +1,19 @@
+# migrate_notification_read_at.py
+# One-off migration: notifications read before read_at existed never expire.
+# Stamp them with their own timestamp so the TTL index / archive job picks them up.
+# Safe to re-run; only read notifications without read_at are touched.
+from models.Notification import Notification
+from db import create_db
+from flask import Flask
+from dotenv import load_dotenv
+
+load_dotenv()
+
+app = Flask(__name__)
+create_db(app)  # Initialize MongoEngine connection
+
+result = Notification._get_collection().update_many(
+    {"read": True, "read_at": {"$exists": False}},
+    [{"$set": {"read_at": "$timestamp"}}] # Pipeline update: copy the field server-side
+)
+print(f"✅ Stamped read_at on {result.modified_count} read notifications.")
@@ -0,0 +1,41 @@
+# migrate_private_message_keys.py
+# One-off migration: backfill PrivateMessage.conversation (the sorted sender /
+# receiver pair) so older messages show up in the conversation-keyed history.
+# Safe to re-run; messages that already have a key are skipped.
+from pymongo import UpdateOne
+from models.PrivateMessage import PrivateMessage, conversation_key
+from db import create_db
+from flask import Flask
+from dotenv import load_dotenv
+
+BATCH_SIZE = 1000
+
+load_dotenv()
+
+app = Flask(__name__)
+create_db(app)  # Initialize MongoEngine connection
+
+collection = PrivateMessage._get_collection()
+PrivateMessage.ensure_indexes()
+cursor = collection.find({"conversation": {"$exists": False}}, {"sender": 1, "receiver": 1})
+
+ops = []
+migrated = skipped = 0
+for doc in cursor:
+    if not doc.get("sender") or not doc.get("receiver"):
+        print(f"⚠️ Skipping message {doc['_id']}: missing sender or receiver")
+        skipped += 1
+        continue
+
+    ops.append(UpdateOne(
+        {"_id": doc["_id"]},
+        {"$set": {"conversation": conversation_key(doc["sender"], doc["receiver"])}}
+    ))
+    if len(ops) >= BATCH_SIZE:
+        migrated += collection.bulk_write(ops, ordered=False).modified_count
+        ops = []
+
+if ops:
+    migrated += collection.bulk_write(ops, ordered=False).modified_count
+
+print(f"✅ Backfilled {migrated} private messages ({skipped} skipped).")
@@ -0,0 +1,24 @@
+from mongoengine import Document, ReferenceField, StringField, DateTimeField
+import datetime
+
+class Friendship(Document):
+    """One directed edge of a relationship, stored from each side.
+
+    A friendship is two 'friend' edges (A->B, B->A); a pending request is a
+    'sent' edge from the requester plus a 'received' edge from the target.
+    """
+    user = ReferenceField('User', required=True)
+    other = ReferenceField('User', required=True)
+    # Relative to `user`: 'friend', 'sent' (I asked), 'received' (they asked)
+    status = StringField(required=True, choices=['friend', 'sent', 'received'])
+    created_at = DateTimeField(default=datetime.datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.datetime.utcnow)
+
+    meta = {
+        'collection': 'friendships',
+        'db_alias': 'default',
+        'indexes': [
+            {'fields': ['user', 'other'], 'unique': True}, # Membership checks
+            {'fields': ['user', 'status', '_id']}          # Paged friend / request lists
+        ]
+    }
@@ -1,11 +1,13 @@
 from mongoengine import Document, StringField, ListField, DateTimeField, DictField
 import datetime
+from utils.timeline_codec import decode_timeline, encode_timeline, downsample
 
 class JournalEntry(Document):
     user_id = StringField(required=True)
     created_at = DateTimeField(default=datetime.datetime.utcnow)
     dominant_emotion = StringField(required=True)
-    timeline = ListField(DictField()) # Stores the graph points [{'time': 1.0, 'emotion': 'Happy'}]
+    timeline = ListField(DictField()) # Legacy: one dict per point [{'time': 1.0, 'emotion': 'Happy'}]
+    timeline_compact = DictField() # Run-length encoded timeline (see utils/timeline_codec.py)
     transcript = StringField() # Text from speech
     analysis_summary = StringField() # "You appeared calm..."
     
@@ -13,4 +15,17 @@ class JournalEntry(Document):
         'indexes': [
             {'fields': ['user_id', '-created_at']} # Index for fast sorting by date
         ]
-    }
\ No newline at end of file
+    }
+
+    def get_timeline(self):
+        """Timeline in API shape, whether stored compact or in the legacy list"""
+        if self.timeline_compact:
+            return decode_timeline(self.timeline_compact)
+        return self.timeline or []
+
+    def get_sparkline(self, points):
+        """Downsampled timeline for list previews"""
+        compact = self.timeline_compact
+        if not compact and self.timeline:
+            compact = encode_timeline(self.timeline)
+        return downsample(compact, points)
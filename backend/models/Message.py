@@ -8,4 +8,10 @@ class Message(Document):
     timestamp = DateTimeField(default=datetime.utcnow)
     group_chat = ReferenceField('GroupChat', required=True)
 
-    meta = {'collection': 'messages', 'db_alias': 'default'}
+    meta = {
+        'collection': 'messages',
+        'db_alias': 'default',
+        'indexes': [
+            {'fields': ['group_chat', '-timestamp', '-_id']} # Latest-N / before-cursor history
+        ]
+    }
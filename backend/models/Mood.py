@@ -1,10 +1,12 @@
-from mongoengine import Document, IntField, ListField, DateField, StringField
+from mongoengine import Document, IntField, ListField, DateField, DateTimeField, StringField
+import datetime
 
 class Mood(Document):
     user_id = StringField(required=True)
     mood = IntField(required=True, min_value=1, max_value=5)
     activities = ListField()
     date = DateField(required=True)
+    updated_at = DateTimeField(default=datetime.datetime.utcnow) # Bumped on every change (insight cache version)
 
     meta = {
         'indexes': [
@@ -0,0 +1,10 @@
+from mongoengine import Document, StringField, DynamicField, DateTimeField
+import datetime
+
+class MoodInsight(Document):
+    """Last generated AI mood insight per user, tagged with the version of its inputs"""
+    user_id = StringField(required=True, unique=True)
+    version = StringField(required=True) # Hash of the mood range the insight was built from
+    insights = DynamicField() # Gemini text or the local fallback dict
+    source = StringField(choices=['gemini', 'local'])
+    generated_at = DateTimeField(default=datetime.datetime.utcnow)
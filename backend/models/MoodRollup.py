@@ -0,0 +1,34 @@
+from mongoengine import Document, StringField, IntField, DictField, DateField, DateTimeField
+import datetime
+
+class MoodRollup(Document):
+    """Weekly / monthly mood aggregates per user, kept current by log_mood"""
+    user_id = StringField(required=True)
+    period = StringField(required=True, choices=['week', 'month'])
+    period_start = DateField(required=True) # Monday of the week / 1st of the month
+    count = IntField(default=0)
+    total = IntField(default=0) # Sum of mood values
+    mood_counts = DictField() # Histogram {"1": n, ..., "5": n}; min/max are derived from it
+    activity_counts = DictField() # {"walk": n, ...}
+    updated_at = DateTimeField(default=datetime.datetime.utcnow)
+
+    meta = {
+        'indexes': [
+            {'fields': ['user_id', 'period', '-period_start'], 'unique': True}
+        ]
+    }
+
+    def to_dict(self):
+        # Histogram instead of stored min/max so corrections can decrement exactly
+        present = sorted(int(k) for k, v in (self.mood_counts or {}).items() if v > 0)
+        return {
+            "period": self.period,
+            "period_start": str(self.period_start),
+            "count": self.count,
+            "sum": self.total,
+            "average": round(self.total / self.count, 2) if self.count else None,
+            "min": present[0] if present else None,
+            "max": present[-1] if present else None,
+            "mood_counts": {k: v for k, v in (self.mood_counts or {}).items() if v > 0},
+            "activity_counts": {k: v for k, v in (self.activity_counts or {}).items() if v > 0}
+        }
@@ -1,5 +1,18 @@
-from mongoengine import Document, ReferenceField, StringField, DateTimeField, BooleanField, DictField
+from mongoengine import Document, ReferenceField, StringField, DateTimeField, BooleanField, DictField, IntField
 from datetime import datetime
+import os
+
+# Read notifications are removed this long after being read, by a TTL index on
+# read_at. With NOTIFICATION_ARCHIVE=1 there is no TTL index and
+# archive_notifications.py moves them to 'notifications_archive' instead.
+# The TTL index is not declared in meta (MongoEngine would fail every query with
+# IndexOptionsConflict once the age changed); manage_notification_expiry.py
+# creates, resizes (collMod) or drops it. Run it after changing either setting.
+# The partial unique index behind message digests (one unread 'message' row per
+# reader and sender) is created by migrate_message_digests.py, after it merges
+# existing duplicates that would make the build fail.
+READ_NOTIFICATION_TTL_DAYS = int(os.getenv("READ_NOTIFICATION_TTL_DAYS", 30))
+ARCHIVE_READ_NOTIFICATIONS = os.getenv("NOTIFICATION_ARCHIVE", "0") == "1"
 
 class Notification(Document):
     user = ReferenceField('User', required=True)
@@ -8,7 +21,16 @@ class Notification(Document):
     message = StringField(required=True)
     related_id = StringField()  # ID of related message, friend request, etc.
     read = BooleanField(default=False)
+    read_at = DateTimeField()  # Set when marked read; drives expiry / archiving
     timestamp = DateTimeField(default=datetime.utcnow)
     metadata = DictField()  # Additional data like sender info
+    count = IntField(default=1)  # Messages coalesced into this notification (utils/notification_digest.py)
     
-    meta = {'collection': 'notifications', 'db_alias': 'default'}
\ No newline at end of file
+    meta = {
+        'collection': 'notifications',
+        'db_alias': 'default',
+        'indexes': [
+            {'fields': ['user', '-timestamp', '-_id']},        # Paged inbox
+            {'fields': ['user', 'read', '-timestamp', '-_id']}  # Unread-only pages, mark-all, reconciliation
+        ]
+    }
@@ -1,11 +1,31 @@
 from mongoengine import Document, StringField, ReferenceField, DateTimeField, BooleanField
 from datetime import datetime
 
+
+def conversation_key(user_a, user_b):
+    """Same key for both directions of a chat: the two user ids, sorted"""
+    return "_".join(sorted((str(user_a), str(user_b))))
+
+
 class PrivateMessage(Document):
     sender = ReferenceField('User', required=True)
     receiver = ReferenceField('User', required=True)
+    conversation = StringField() # conversation_key(sender, receiver), set on save
     message = StringField(required=True)
     timestamp = DateTimeField(default=datetime.utcnow)
     read = BooleanField(default=False)
     
-    meta = {'collection': 'private_messages', 'db_alias': 'default'}
\ No newline at end of file
+    meta = {
+        'collection': 'private_messages',
+        'db_alias': 'default',
+        'indexes': [
+            {'fields': ['conversation', '-timestamp', '-_id']}, # One range scan per chat page
+            {'fields': ['receiver', 'read']} # Mark-read and unread counter reconciliation
+        ]
+    }
+
+    def clean(self):
+        if self.sender and self.receiver:
+            self.conversation = conversation_key(
+                getattr(self.sender, 'id', self.sender), getattr(self.receiver, 'id', self.receiver)
+            )
@@ -0,0 +1,12 @@
+from mongoengine import Document, ObjectIdField, IntField, DateTimeField
+import datetime
+
+class UnreadCounter(Document):
+    """Per-user unread totals, kept current with atomic $inc (see utils/unread_counters.py)"""
+    user_id = ObjectIdField(primary_key=True) # One point read by _id per poll
+    notifications = IntField(default=0)
+    messages = IntField(default=0) # Unread private messages
+    updated_at = DateTimeField(default=datetime.datetime.utcnow)
+    reconciled_at = DateTimeField() # Last time the totals were recounted from source
+
+    meta = {'collection': 'unread_counters', 'db_alias': 'default'}
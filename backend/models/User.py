@@ -21,12 +21,20 @@ class User(Document):
     bio = StringField()
     status = StringField(default='offline')
     
-    # Friend system
-    friends = ListField(ReferenceField('self'))  # List of accepted friends
-    friend_requests_sent = ListField(ReferenceField('self'))  # Requests I sent
-    friend_requests_received = ListField(ReferenceField('self'))  # Requests I received
+    # Friend system (legacy): relationships now live in the Friendship edge
+    # collection. Kept only so un-migrated documents still load; run
+    # migrate_friendships.py to move them over and drop these arrays.
+    friends = ListField(ReferenceField('self'))
+    friend_requests_sent = ListField(ReferenceField('self'))
+    friend_requests_received = ListField(ReferenceField('self'))
 
-    meta = {'collection': 'user', 'db_alias': 'default'}
+    meta = {
+        'collection': 'user',
+        'db_alias': 'default',
+        'indexes': [
+            {'fields': ['role', 'interests']} # Buddy discovery (multikey)
+        ]
+    }
 
     def set_password(self, raw_password):
         self.password = generate_password_hash(raw_password)
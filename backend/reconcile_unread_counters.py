@@ -0,0 +1,23 @@
+# reconcile_unread_counters.py
+# Periodic job: recount unread notifications / private messages from source and
+# overwrite the UnreadCounter documents, fixing any drift. Schedule it (e.g.
+# nightly cron); it is also safe to run by hand at any time.
+from utils.unread_counters import reconcile
+from models.UnreadCounter import UnreadCounter
+from db import create_db
+from flask import Flask
+from dotenv import load_dotenv
+
+load_dotenv()
+
+app = Flask(__name__)
+create_db(app)  # Initialize MongoEngine connection
+
+before = {doc["_id"]: doc for doc in UnreadCounter._get_collection().find({}, {"notifications": 1, "messages": 1})}
+totals = reconcile()
+
+drifted = [
+    uid for uid, counts in totals.items()
+    if uid not in before or any(before[uid].get(f, 0) != counts[f] for f in counts)
+]
+print(f"✅ Reconciled {len(totals)} users' unread counters ({len(drifted)} corrected).")
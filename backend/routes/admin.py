@@ -2,6 +2,8 @@ from flask import Blueprint, jsonify
 from models.User import User
 from middleware.auth import authenticate
 from models.Appointment import Appointment
+from utils.friends import remove_user_edges
+from utils.buddy_index import index as buddy_index
 import datetime
 
 admin_bp = Blueprint('admin_bp', __name__)
@@ -129,6 +131,8 @@ def delete_user(current_user, id):
             
         # 3. Delete
         user_to_delete.delete()
+        remove_user_edges(user_to_delete.id)
+        buddy_index.remove_user(user_to_delete.id)
         return jsonify({"message": "User account deleted successfully"}), 200
         
     except Exception as e:
@@ -1,12 +1,21 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.User import User
 from models.GroupChat import GroupChat
 from models.Message import Message
-from models.PrivateMessage import PrivateMessage
-from mongoengine.errors import DoesNotExist, ValidationError
+from models.PrivateMessage import PrivateMessage, conversation_key
 from bson import ObjectId
 import traceback
+from utils.pagination import parse_limit, page, paginated_response, encode_cursor, before_cursor
+from utils.buddy_matching import ranked_buddies
+from utils.buddy_index import get_index, METRICS
+from utils.unread_counters import bump, get_counts
+from utils.notification_digest import notify_message
+from utils.realtime import get_broker, publish, event_stream, user_topic, group_topic
+from utils.friends import (
+    FRIEND, SENT, RECEIVED, ACCEPTED, are_friends, edge_page, fetch_users, relations,
+    send_request, accept_request, reject_request
+)
 
 buddy = Blueprint('buddy', __name__, url_prefix='/api')
 
@@ -16,28 +25,59 @@ from datetime import datetime
 
 # === NOTIFICATION SYSTEM ===
 
-# Get all notifications for current user
+def notification_json(notif):
+    return {
+        "id": str(notif.id),
+        "type": notif.type,
+        "title": notif.title,
+        "message": notif.message,
+        "related_id": notif.related_id,
+        "read": notif.read,
+        "timestamp": notif.timestamp.isoformat(),
+        "metadata": notif.metadata or {},
+        "count": notif.count or 1
+    }
+
+
+def push_counts(user_id):
+    """Send fresh unread counts to the user's open streams (skipped if there are none)"""
+    if get_broker().has_subscribers(user_topic(user_id)):
+        publish(user_topic(user_id), 'counts', get_counts(user_id))
+
+
+def push_notification(user_id, notification):
+    """Deliver a freshly saved notification and the new unread counts to open streams"""
+    if get_broker().has_subscribers(user_topic(user_id)):
+        publish(user_topic(user_id), 'notification', notification_json(notification))
+        push_counts(user_id)
+
+
+# Get notifications for current user: newest page first, older via ?before=<X-Next-Cursor>
+NOTIFICATION_PAGE_SIZE = 20
+MAX_NOTIFICATION_PAGE_SIZE = 100
+
 @buddy.route('/notifications', methods=['GET'])
 @jwt_required()
 def get_notifications():
     try:
         current_user_id = get_jwt_identity()
-        notifications = Notification.objects(user=ObjectId(current_user_id)).order_by('-timestamp')
-        
-        result = []
-        for notif in notifications:
-            result.append({
-                "id": str(notif.id),
-                "type": notif.type,
-                "title": notif.title,
-                "message": notif.message,
-                "related_id": notif.related_id,
-                "read": notif.read,
-                "timestamp": notif.timestamp.isoformat(),
-                "metadata": notif.metadata or {}
-            })
-            
-        return jsonify(result), 200
+        limit = parse_limit(NOTIFICATION_PAGE_SIZE, MAX_NOTIFICATION_PAGE_SIZE)
+
+        query = Notification.objects(user=ObjectId(current_user_id))
+        if request.args.get('unread') in ('1', 'true'):
+            query = query.filter(read=False)
+        try:
+            if request.args.get('before'):
+                query = query.filter(__raw__=before_cursor('timestamp', request.args['before']))
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        notifications, has_more = page(list(query.order_by('-timestamp', '-id').limit(limit + 1)), limit)
+        result = [notification_json(notif) for notif in notifications]
+
+        last = notifications[-1] if notifications else None
+        next_cursor = encode_cursor(last.timestamp, last.id) if has_more else None
+        return paginated_response(result, next_cursor)
         
     except Exception as e:
         print("❌ Error in get_notifications:", e)
@@ -50,13 +90,17 @@ def get_notifications():
 def mark_notification_read(notification_id):
     try:
         current_user_id = get_jwt_identity()
-        notification = Notification.objects(id=ObjectId(notification_id), user=ObjectId(current_user_id)).first()
+        # Only an unread -> read transition touches the counter
+        changed = Notification.objects(
+            id=ObjectId(notification_id), user=ObjectId(current_user_id), read=False
+        ).update_one(set__read=True, set__read_at=datetime.utcnow())
         
-        if not notification:
+        if not changed and not Notification.objects(id=ObjectId(notification_id), user=ObjectId(current_user_id)).only('id').first():
             return jsonify({"message": "Notification not found"}), 404
             
-        notification.read = True
-        notification.save()
+        if changed:
+            bump(current_user_id, notifications=-1)
+            push_counts(current_user_id)
         
         return jsonify({"message": "Notification marked as read"}), 200
         
@@ -71,7 +115,11 @@ def mark_notification_read(notification_id):
 def mark_all_notifications_read():
     try:
         current_user_id = get_jwt_identity()
-        Notification.objects(user=ObjectId(current_user_id), read=False).update(set__read=True)
+        changed = Notification.objects(user=ObjectId(current_user_id), read=False).update(
+            set__read=True, set__read_at=datetime.utcnow()
+        )
+        bump(current_user_id, notifications=-changed)
+        push_counts(current_user_id)
         
         return jsonify({"message": "All notifications marked as read"}), 200
         
@@ -86,7 +134,7 @@ def mark_all_notifications_read():
 def get_unread_count():
     try:
         current_user_id = get_jwt_identity()
-        count = Notification.objects(user=ObjectId(current_user_id), read=False).count()
+        count = get_counts(current_user_id)["notifications"]
         
         return jsonify({"unread_count": count}), 200
         
@@ -95,6 +143,8 @@ def get_unread_count():
         traceback.print_exc()
         return jsonify({"message": "Internal Server Error", "error": str(e)}), 500
 # === FRIEND SYSTEM ===
+FRIEND_PAGE_SIZE = 100
+MAX_FRIEND_PAGE_SIZE = 500
 
 # Send friend request
 @buddy.route('/friend-request/send/<user_id>', methods=['POST'])
@@ -106,8 +156,8 @@ def send_friend_request(user_id):
         if not ObjectId.is_valid(user_id):
             return jsonify({"message": "Invalid user ID"}), 400
             
-        current_user = User.objects(id=ObjectId(current_user_id)).first()
-        target_user = User.objects(id=ObjectId(user_id)).first()
+        current_user = User.objects(id=ObjectId(current_user_id)).only('name').first()
+        target_user = User.objects(id=ObjectId(user_id)).only('id').first()
         
         if not target_user:
             return jsonify({"message": "User not found"}), 404
@@ -115,20 +165,17 @@ def send_friend_request(user_id):
         if target_user.id == current_user.id:
             return jsonify({"message": "Cannot send friend request to yourself"}), 400
             
-        # Check if already friends
-        if current_user.id in [friend.id for friend in target_user.friends]:
+        # Send request; an existing relationship comes back instead
+        existing = send_request(current_user.id, target_user.id)
+        if existing == FRIEND:
             return jsonify({"message": "Already friends"}), 400
-            
-        # Check if request already sent
-        if target_user.id in [user.id for user in current_user.friend_requests_sent]:
+        if existing == SENT:
             return jsonify({"message": "Friend request already sent"}), 400
-            
-        # Send request
-        current_user.friend_requests_sent.append(target_user)
-        target_user.friend_requests_received.append(current_user)
-        
-        current_user.save()
-        target_user.save()
+        if existing == RECEIVED:
+            return jsonify({"message": "This user already sent you a friend request"}), 400
+        if existing == ACCEPTED:
+            return jsonify({"message": "Friend added"}), 200
+
          # Create notification for the target user
         notification = Notification(
             user=target_user,
@@ -142,6 +189,8 @@ def send_friend_request(user_id):
             }
         )
         notification.save()
+        bump(target_user.id, notifications=1)
+        push_notification(target_user.id, notification)
         
         return jsonify({"message": "Friend request sent successfully"}), 200
         
@@ -154,18 +203,22 @@ def send_friend_request(user_id):
 def get_friend_requests():
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.objects(id=current_user_id).first()
-        if not current_user: return jsonify({"error": "User not found"}), 404
+        limit = parse_limit(FRIEND_PAGE_SIZE, MAX_FRIEND_PAGE_SIZE)
+        try:
+            users, next_cursor = edge_page(current_user_id, RECEIVED, limit,
+                                           request.args.get('cursor'), ('name', 'bio', 'avatar_seed'))
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
 
         requests = []
-        for req_user in current_user.friend_requests_received:
+        for req_user in users:
             requests.append({
-                "id": str(req_user.id),
-                "name": req_user.name,
-                "bio": req_user.bio or "No bio available",
-                "avatar_seed": req_user.avatar_seed or req_user.name 
+                "id": str(req_user['_id']),
+                "name": req_user.get('name'),
+                "bio": req_user.get('bio') or "No bio available",
+                "avatar_seed": req_user.get('avatar_seed') or req_user.get('name')
             })
-        return jsonify(requests), 200
+        return paginated_response(requests, next_cursor)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 # Accept friend request
@@ -174,24 +227,16 @@ def get_friend_requests():
 def accept_friend_request(user_id):
     try:
         curr_id = get_jwt_identity()
-        me = User.objects(id=curr_id).first()
-        requester = User.objects(id=user_id).first()
-
-        if not me or not requester:
-            return jsonify({"message": "User not found"}), 404
 
-        # 1. Add to friends list (Avoid duplicates)
-        if requester not in me.friends: me.friends.append(requester)
-        if me not in requester.friends: requester.friends.append(me)
+        if not ObjectId.is_valid(user_id):
+            return jsonify({"message": "Invalid user ID"}), 400
 
-        # 2. Remove from request lists (ROBUST WAY: Filter by ID)
-        # We recreate the list filtering out the ID we want to remove
-        # This avoids "ValueError: x not in list" if object instances differ
-        me.friend_requests_received = [u for u in me.friend_requests_received if str(u.id) != str(requester.id)]
-        requester.friend_requests_sent = [u for u in requester.friend_requests_sent if str(u.id) != str(me.id)]
+        if not User.objects(id=ObjectId(user_id)).only('id').first():
+            return jsonify({"message": "User not found"}), 404
 
-        me.save()
-        requester.save()
+        # Flips both edges to 'friend'; user documents are untouched
+        if not accept_request(curr_id, user_id):
+            return jsonify({"message": "No pending friend request from this user"}), 404
 
         return jsonify({"message": "Friend added"}), 200
     except Exception as e:
@@ -208,19 +253,15 @@ def reject_friend_request(user_id):
         if not ObjectId.is_valid(user_id):
             return jsonify({"message": "Invalid user ID"}), 400
             
-        current_user = User.objects(id=ObjectId(current_user_id)).first()
-        requester = User.objects(id=ObjectId(user_id)).first()
+        requester = User.objects(id=ObjectId(user_id)).only('id').first()
         
         if not requester:
             return jsonify({"message": "User not found"}), 404
             
         # Remove from requests
-        current_user.friend_requests_received = [user for user in current_user.friend_requests_received if user.id != requester.id]
-        requester.friend_requests_sent = [user for user in requester.friend_requests_sent if user.id != current_user.id]
-        
-        current_user.save()
-        requester.save()
-        
+        if not reject_request(current_user_id, requester.id):
+            return jsonify({"message": "No pending friend request from this user"}), 404
+
         return jsonify({"message": "Friend request rejected"}), 200
         
     except Exception as e:
@@ -235,21 +276,25 @@ def reject_friend_request(user_id):
 def get_friends():
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.objects(id=ObjectId(current_user_id)).first()
+        limit = parse_limit(FRIEND_PAGE_SIZE, MAX_FRIEND_PAGE_SIZE)
+        try:
+            users, next_cursor = edge_page(current_user_id, FRIEND, limit, request.args.get('cursor'))
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
         
         friends = []
-        for user in current_user.friends:
+        for user in users:
             friends.append({
-                "id": str(user.id),
-                "name": user.name,
-                "age": user.age,
-                "location": user.location,
-                "bio": user.bio,
-                "interests": user.interests,
-                "status": user.status
+                "id": str(user['_id']),
+                "name": user.get('name'),
+                "age": user.get('age'),
+                "location": user.get('location'),
+                "bio": user.get('bio'),
+                "interests": user.get('interests') or [],
+                "status": user.get('status')
             })
             
-        return jsonify(friends), 200
+        return paginated_response(friends, next_cursor)
         
     except Exception as e:
         print("❌ Error in get_friends:", e)
@@ -272,14 +317,14 @@ def send_private_message():
         if not ObjectId.is_valid(sender_id) or not ObjectId.is_valid(receiver_id):
             return jsonify({"message": "Invalid user ID format"}), 400
 
-        sender = User.objects(id=ObjectId(sender_id)).first()
-        receiver = User.objects(id=ObjectId(receiver_id)).first()
+        sender = User.objects(id=ObjectId(sender_id)).only('name').first()
+        receiver = User.objects(id=ObjectId(receiver_id)).only('id').first()
 
         if not sender or not receiver:
             return jsonify({"message": "User not found"}), 404
 
         # Check if they are friends
-        if receiver.id not in [friend.id for friend in sender.friends]:
+        if not are_friends(sender.id, receiver.id):
             return jsonify({"message": "You can only message friends"}), 403
 
         # Create the message
@@ -290,20 +335,21 @@ def send_private_message():
         )
         msg.save()
 
-        # Create notification for the receiver
-        notification = Notification(
-            user=receiver,
-            type='message',
-            title='New Message',
-            message=f'You have a new message from {sender.name}',
-            related_id=str(msg.id),
-            metadata={
-                'sender_id': str(sender.id),
-                'sender_name': sender.name,
-                'message_preview': text[:50] + ('...' if len(text) > 50 else '')
-            }
-        )
-        notification.save()
+        # Notify the receiver: folds into their unread notification from this sender, if any
+        notification, created = notify_message(receiver.id, sender.id, sender.name, msg.id, text)
+        bump(receiver.id, notifications=1 if created else 0, messages=1)
+
+        # Same shape as GET /private-messages/<friend_id>, from the receiver's side
+        publish(user_topic(receiver.id), 'private_message', {
+            "id": str(msg.id),
+            "sender": str(sender.id),
+            "senderName": sender.name,
+            "receiver": str(receiver.id),
+            "message": msg.message,
+            "timestamp": msg.timestamp.isoformat(),
+            "isCurrentUser": False
+        })
+        push_notification(receiver.id, notification)
 
         return jsonify({'message': 'Message sent successfully'}), 201
 
@@ -312,7 +358,10 @@ def send_private_message():
         traceback.print_exc()
         return jsonify({"message": "Internal Server Error", "error": str(e)}), 500
 
-# Get private messages between users
+# Get private messages between users: newest page first, older via ?before=<X-Next-Cursor>
+PRIVATE_MESSAGE_PAGE_SIZE = 50
+MAX_PRIVATE_MESSAGE_PAGE_SIZE = 200
+
 @buddy.route('/private-messages/<friend_id>', methods=['GET'])
 @jwt_required()
 def get_private_messages(friend_id):
@@ -322,27 +371,40 @@ def get_private_messages(friend_id):
         if not ObjectId.is_valid(current_user_id) or not ObjectId.is_valid(friend_id):
             return jsonify({"message": "Invalid user ID format"}), 400
 
-        # Get messages in both directions
-        messages = PrivateMessage.objects(
-            (PrivateMessage.sender == ObjectId(current_user_id)) & 
-            (PrivateMessage.receiver == ObjectId(friend_id)) |
-            (PrivateMessage.sender == ObjectId(friend_id)) & 
-            (PrivateMessage.receiver == ObjectId(current_user_id))
-        ).order_by('timestamp')
-        
+        limit = parse_limit(PRIVATE_MESSAGE_PAGE_SIZE, MAX_PRIVATE_MESSAGE_PAGE_SIZE)
+        # Both directions share one key, so this is a single (conversation, -timestamp) range scan
+        query = {"conversation": conversation_key(current_user_id, friend_id)}
+        try:
+            if request.args.get('before'):
+                query.update(before_cursor('timestamp', request.args['before']))
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        messages = list(PrivateMessage._get_collection().find(
+            query, {"sender": 1, "receiver": 1, "message": 1, "timestamp": 1}
+        ).sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1))
+        messages, has_more = page(messages, limit)
+
+        # Only two possible senders: resolve both names once
+        names = {oid: u.get("name") for oid, u in fetch_users(
+            [ObjectId(current_user_id), ObjectId(friend_id)], ('name',)
+        ).items()}
+
         result = []
-        for msg in messages:
+        for msg in reversed(messages): # Chronological, as the chat renders it
             result.append({
-                "id": str(msg.id),
-                "sender": str(msg.sender.id),
-                "senderName": msg.sender.name,
-                "receiver": str(msg.receiver.id),
-                "message": msg.message,
-                "timestamp": msg.timestamp.isoformat(),
-                "isCurrentUser": str(msg.sender.id) == current_user_id
+                "id": str(msg["_id"]),
+                "sender": str(msg["sender"]),
+                "senderName": names.get(msg["sender"], "Deleted User"),
+                "receiver": str(msg["receiver"]),
+                "message": msg.get("message"),
+                "timestamp": msg["timestamp"].isoformat(),
+                "isCurrentUser": str(msg["sender"]) == current_user_id
             })
 
-        return jsonify(result), 200
+        oldest = messages[-1] if messages else None
+        next_cursor = encode_cursor(oldest["timestamp"], oldest["_id"]) if has_more else None
+        return paginated_response(result, next_cursor)
 
     except Exception as e:
         print("❌ Error in get_private_messages:")
@@ -355,11 +417,13 @@ def mark_messages_as_read(friend_id):
         current_user_id = get_jwt_identity()
         
         # Mark all messages from this friend as read
-        PrivateMessage.objects(
+        changed = PrivateMessage.objects(
             sender=ObjectId(friend_id),
             receiver=ObjectId(current_user_id),
             read=False
         ).update(set__read=True)
+        bump(current_user_id, messages=-changed)
+        push_counts(current_user_id)
         
         return jsonify({"message": "Messages marked as read"}), 200
         
@@ -374,7 +438,7 @@ def mark_messages_as_read(friend_id):
 def get_unread_message_count():
     try:
         current_user_id = get_jwt_identity()
-        count = PrivateMessage.objects(receiver=ObjectId(current_user_id), read=False).count()
+        count = get_counts(current_user_id)["messages"]
         
         return jsonify({"unread_message_count": count}), 200
         
@@ -384,53 +448,102 @@ def get_unread_message_count():
         return jsonify({"message": "Internal Server Error", "error": str(e)}), 500
 # === GROUP CHATS (existing but enhanced) ===
 
-# Get all buddies (existing - keep this)
+# Get buddies ranked by shared interests (paginated, scored in MongoDB)
+BUDDY_PAGE_SIZE = 50
+MAX_BUDDY_PAGE_SIZE = 100
+
 @buddy.route('/buddies', methods=['GET'])
 @jwt_required()
 def get_buddies():
     try:
         current_user_id = get_jwt_identity()
-        # Filter: Exclude self AND ensure role is 'user' (Hide admins/psychologists)
-        users = User.objects(id__ne=ObjectId(current_user_id), role='user')
-        
-        current_user = User.objects(id=current_user_id).first()
-        
-        # Pre-calculate ID sets for speed
-        friend_ids = {f.id for f in current_user.friends}
-        sent_ids = {f.id for f in current_user.friend_requests_sent}
-        received_ids = {f.id for f in current_user.friend_requests_received}
+        limit = parse_limit(BUDDY_PAGE_SIZE, MAX_BUDDY_PAGE_SIZE)
+
+        me = User.objects(id=ObjectId(current_user_id)).only('interests').as_pymongo().first()
+        if not me:
+            return jsonify({"error": "User not found"}), 404
+
+        try:
+            # Filter: Exclude self AND ensure role is 'user' (Hide admins/psychologists)
+            users, next_cursor = ranked_buddies(me['_id'], me.get('interests'), limit, request.args.get('cursor'))
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        # Relationship flags for this page only, from the edge collection
+        related = relations(me['_id'], [u['_id'] for u in users])
 
         result = []
         for user in users:
-            # Simple Match Score (Shared Interests)
-            user_interests = set(user.interests or [])
-            my_interests = set(current_user.interests or [])
-            match_score = len(user_interests.intersection(my_interests))
-
             result.append({
-                "id": str(user.id),
-                "name": user.name,
-                "age": user.age,
-                "interests": user.interests or [],
-                "bio": user.bio,
-                "location": user.location,
-                "status": user.status,
-                "matchScore": match_score,
-                "isFriend": user.id in friend_ids,
-                "friendRequestSent": user.id in sent_ids,
-                "friendRequestReceived": user.id in received_ids
+                "id": str(user['_id']),
+                "name": user.get('name'),
+                "age": user.get('age'),
+                "interests": user.get('interests') or [],
+                "bio": user.get('bio'),
+                "location": user.get('location'),
+                "status": user.get('status'),
+                "matchScore": user['matchScore'],
+                "isFriend": related.get(user['_id']) == FRIEND,
+                "friendRequestSent": related.get(user['_id']) == SENT,
+                "friendRequestReceived": related.get(user['_id']) == RECEIVED
             })
         
-        # Sort by match score
-        result.sort(key=lambda x: x['matchScore'], reverse=True)
-        
-        return jsonify(result), 200
+        return paginated_response(result, next_cursor)
 
     except Exception as e:
         print("Error fetching buddies:", e)
         return jsonify({"error": str(e)}), 500
 
 
+# Top-k recommendations from the in-memory interest index (utils/buddy_index.py)
+@buddy.route('/buddies/recommended', methods=['GET'])
+@jwt_required()
+def get_recommended_buddies():
+    try:
+        current_user_id = get_jwt_identity()
+        k = parse_limit(20, MAX_BUDDY_PAGE_SIZE)
+        metric = request.args.get('metric', 'jaccard')
+        if metric not in METRICS:
+            return jsonify({"error": f"metric must be one of {', '.join(METRICS)}"}), 400
+
+        me = User.objects(id=ObjectId(current_user_id)).only('interests').as_pymongo().first()
+        if not me:
+            return jsonify({"error": "User not found"}), 404
+
+        top = get_index().top_k(me.get('interests'), k, metric, exclude=[current_user_id])
+        ids = [ObjectId(user_id) for user_id, _, _ in top]
+        users = {u['_id']: u for u in User.objects(id__in=ids).only(
+            'name', 'age', 'interests', 'bio', 'location', 'status'
+        ).as_pymongo()}
+        related = relations(me['_id'], ids)
+
+        result = []
+        for oid, (_, score, overlap) in zip(ids, top):
+            user = users.get(oid)
+            if not user: # deleted since the index was built
+                continue
+            result.append({
+                "id": str(oid),
+                "name": user.get('name'),
+                "age": user.get('age'),
+                "interests": user.get('interests') or [],
+                "bio": user.get('bio'),
+                "location": user.get('location'),
+                "status": user.get('status'),
+                "matchScore": overlap,
+                "similarity": round(score, 4),
+                "isFriend": related.get(oid) == FRIEND,
+                "friendRequestSent": related.get(oid) == SENT,
+                "friendRequestReceived": related.get(oid) == RECEIVED
+            })
+
+        return jsonify(result), 200
+
+    except Exception as e:
+        print("Error fetching recommended buddies:", e)
+        return jsonify({"error": str(e)}), 500
+
+
 # Get all group chats (existing - keep this)
 @buddy.route('/group-chats', methods=['GET'])
 @jwt_required()
@@ -534,6 +647,16 @@ def send_message():
         msg.save()
         print("✅ Saved message successfully")
 
+        # Same shape as GET /messages/<group_id>; isCurrentUser is decided client-side
+        publish(group_topic(group.id), 'group_message', {
+            "id": str(msg.id),
+            "groupId": str(group.id),
+            "author": author.name,
+            "authorId": str(author.id),
+            "message": msg.message,
+            "timestamp": msg.timestamp.isoformat()
+        })
+
         return jsonify({'message': 'Message sent successfully'}), 201
 
     except Exception as e:
@@ -541,8 +664,10 @@ def send_message():
         traceback.print_exc()
         return jsonify({"message": "Internal Server Error", "error": str(e)}), 500
 
-# Get group messages (existing - keep this)
-# FIX: Robust get_messages that handles deleted users
+# Get group messages: newest page first, older pages via ?before=<X-Next-Cursor>
+GROUP_MESSAGE_PAGE_SIZE = 50
+MAX_GROUP_MESSAGE_PAGE_SIZE = 200
+
 @buddy.route('/messages/<group_id>', methods=['GET'])
 @jwt_required()
 def get_messages(group_id):
@@ -552,46 +677,71 @@ def get_messages(group_id):
         if not ObjectId.is_valid(group_id):
             return jsonify({"message": "Invalid group ID format"}), 400
 
-        # Fetch messages for the group
-        messages = Message.objects(group_chat=ObjectId(group_id)).order_by('timestamp')
+        limit = parse_limit(GROUP_MESSAGE_PAGE_SIZE, MAX_GROUP_MESSAGE_PAGE_SIZE)
+        query = {"group_chat": ObjectId(group_id)}
+        try:
+            if request.args.get('before'):
+                query.update(before_cursor('timestamp', request.args['before']))
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        # Walks the (group_chat, -timestamp, -_id) index: cost is one page, not the group's history
+        messages = list(Message._get_collection().find(
+            query, {"author": 1, "message": 1, "timestamp": 1}
+        ).sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1))
+        messages, has_more = page(messages, limit)
+
+        # Every author on the page in one projected query; missing ones were deleted
+        authors = fetch_users({m.get("author") for m in messages if m.get("author")}, ('name',))
+
         result = []
-        
-        for msg in messages:
-            try:
-                # DEFAULT VALUES if author is missing
-                author_name = "Deleted User"
-                is_current_user = False
-                
-                # SAFE AUTHOR CHECK (The Fix)
-                # We check if 'author' field exists AND if we can access its properties without crashing
-                if msg.author:
-                    try:
-                        # Attempt to access a property to trigger the DB lookup
-                        # If the user was deleted, this line will throw the DoesNotExist error
-                        _ = msg.author.id 
-                        
-                        author_name = msg.author.name
-                        is_current_user = (str(msg.author.id) == current_user_id)
-                    except DoesNotExist:
-                        # User was deleted from DB. Keep "Deleted User" default.
-                        pass
-                
-                message_data = {
-                    "id": str(msg.id),
-                    "author": author_name,
-                    "message": msg.message,
-                    "timestamp": msg.timestamp.isoformat() if msg.timestamp else datetime.datetime.utcnow().isoformat(),
-                    "isCurrentUser": is_current_user
-                }
-                result.append(message_data)
-                
-            except Exception as msg_error:
-                # If a specific message is totally corrupted, skip it but log it
-                print(f"⚠️ Skipping corrupted message: {msg_error}")
-                continue
+        for msg in reversed(messages): # Chronological, as the chat renders it
+            author = authors.get(msg.get("author"))
+            result.append({
+                "id": str(msg["_id"]),
+                "author": author.get("name") if author else "Deleted User",
+                "message": msg.get("message"),
+                "timestamp": (msg.get("timestamp") or datetime.utcnow()).isoformat(),
+                "isCurrentUser": author is not None and str(author["_id"]) == current_user_id
+            })
 
-        return jsonify(result), 200
+        oldest = messages[-1] if messages else None
+        next_cursor = encode_cursor(oldest["timestamp"], oldest["_id"]) if has_more else None
+        return paginated_response(result, next_cursor)
 
     except Exception as e:
         print("❌ Error in get_messages:", e)
-        return jsonify({"message": "Internal Server Error", "error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"message": "Internal Server Error", "error": str(e)}), 500
+
+
+# === REAL-TIME (Server-Sent Events) ===
+MAX_STREAM_GROUPS = 20
+
+# EventSource cannot send headers, so the token may also come as ?jwt=<token>
+@buddy.route('/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_events():
+    """
+    One long-lived stream per tab: 'private_message', 'notification' and
+    'counts' for the user, plus 'group_message' for ?groups=<id>,<id>.
+    Starts with the current unread counts, so no polling is needed.
+    """
+    current_user_id = get_jwt_identity()
+    group_ids = [g for g in request.args.get('groups', '').split(',') if ObjectId.is_valid(g)]
+    if len(group_ids) > MAX_STREAM_GROUPS:
+        return jsonify({"error": f"At most {MAX_STREAM_GROUPS} groups per stream"}), 400
+
+    try:
+        counts = get_counts(current_user_id)
+    except Exception as e:
+        print("❌ Error in stream_events:", e)
+        return jsonify({"message": "Internal Server Error", "error": str(e)}), 500
+
+    subscription = get_broker().subscribe(
+        [user_topic(current_user_id)] + [group_topic(g) for g in group_ids]
+    )
+    return Response(
+        event_stream(subscription, initial=[('counts', counts)]),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -1,12 +1,29 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context
 from models.Mood import Mood
+from mongoengine.errors import NotUniqueError
+from bson import ObjectId
 import datetime
 from middleware.auth import authenticate
-import io
 import os
-from utils.emotion_model import detector # Import the class we just created
+import json
+import math
+from collections import Counter
+from utils.emotion_model import (
+    detector, make_sampling_policy, parse_face_box, parse_face_boxes, unpack_frames,
+    PayloadTooLarge, MAX_SNAPSHOT_BYTES, MAX_BATCH_FRAMES, MAX_BATCH_BYTES
+)
 import tempfile
 from models.JournalEntry import JournalEntry
+from utils.timeline_codec import encode_timeline, decode_timeline, dominant_emotion, average_confidence, EMOTIONS
+from utils.mood_rollups import apply_mood_change, get_rollups, rebuild_rollups, bulk_upsert_moods
+from utils.mood_insights import (
+    load_inputs, generate as generate_insights, is_fresh, local_summary, schedule_refresh, NO_DATA_MESSAGE
+)
+from models.MoodInsight import MoodInsight
+from utils.mood_analytics import user_analytics
+from utils.mood_report import get_report, MAX_REPORT_DAYS
+from utils.pagination import parse_limit, page, paginated_response, encode_cursor, before_cursor
+from utils.bulk_io import FORMATS, MIMETYPES, ndjson_lines, csv_lines, iter_records, ErrorReport
 from dotenv import load_dotenv # Added import
 
 # Load environment variables from .env file
@@ -15,23 +32,19 @@ load_dotenv()
 moods_bp = Blueprint('moods_bp', __name__)
 
 # --- HELPER: Generate Narrative Summary ---
-def generate_narrative(timeline):
-    if not timeline: return "No emotional data detected."
+def generate_narrative(compact):
+    """Narrative from a compact timeline (utils.timeline_codec); linear in the number of runs"""
+    if not compact or not compact["n"]: return "No emotional data detected."
     
     # Split timeline into 3 parts: Beginning, Middle, End
-    n = len(timeline)
-    start_slice = timeline[:n//3] or timeline[:1]
-    mid_slice = timeline[n//3 : 2*n//3] or timeline[0:1]
-    end_slice = timeline[2*n//3:] or timeline[-1:]
-    
-    def get_dom(slice_data):
-        if not slice_data: return "Neutral"
-        emotions = [t['emotion'] for t in slice_data]
-        return max(set(emotions), key=emotions.count)
+    n = compact["n"]
+    start_range = (0, n//3) if n//3 else (0, 1)
+    mid_range = (n//3, 2*n//3) if 2*n//3 > n//3 else (0, 1)
+    end_range = (2*n//3, n)
 
-    start_emo = get_dom(start_slice)
-    mid_emo = get_dom(mid_slice)
-    end_emo = get_dom(end_slice)
+    start_emo = dominant_emotion(compact, *start_range)
+    mid_emo = dominant_emotion(compact, *mid_range)
+    end_emo = dominant_emotion(compact, *end_range)
 
     if start_emo == mid_emo == end_emo:
         return f"You appeared consistently {start_emo} throughout your reflection."
@@ -43,205 +56,464 @@ def generate_narrative(timeline):
 # ----------------------------------------
 # GET moods for logged-in user ONLY
 # ----------------------------------------
+MOOD_PAGE_SIZE = 366
+MAX_MOOD_PAGE_SIZE = 1000
+
 @moods_bp.route('/', methods=['GET'])
 @authenticate
 def get_moods(current_user):
-
-    moods = Mood.objects(user_id=str(current_user.id)).order_by('-date')
-
-    return jsonify([
+    """
+    Newest-first mood history, one page at a time (keyset pagination on date).
+    ?limit=N, ?before=YYYY-MM-DD (older page) or ?after=YYYY-MM-DD (newer page).
+    ?format=columnar returns parallel arrays for charts.
+    The X-Next-Cursor header holds the `before` value of the next older page.
+    """
+    limit = parse_limit(MOOD_PAGE_SIZE, MAX_MOOD_PAGE_SIZE)
+    try:
+        before = datetime.date.fromisoformat(request.args['before']) if request.args.get('before') else None
+        after = datetime.date.fromisoformat(request.args['after']) if request.args.get('after') else None
+    except ValueError:
+        return jsonify({"error": "before/after must be YYYY-MM-DD dates"}), 400
+
+    query = Mood.objects(user_id=str(current_user.id))
+    if before:
+        query = query.filter(date__lt=before)
+    if after:
+        # Walk forward from the cursor, then flip so the page is still newest-first
+        query = query.filter(date__gt=after).order_by('date')
+    else:
+        query = query.order_by('-date')
+
+    # Projected raw dicts: no MongoEngine document hydration
+    rows = list(query.only('date', 'mood', 'activities').limit(limit + 1).as_pymongo())
+    rows, has_more = page(rows, limit)
+    if after:
+        rows.reverse()
+    dates = [str(r['date'].date()) for r in rows]
+    next_cursor = dates[-1] if has_more and not after else None
+
+    if request.args.get('format') == 'columnar':
+        return paginated_response({
+            "dates": dates,
+            "moods": [r['mood'] for r in rows],
+            "next_cursor": next_cursor
+        }, next_cursor)
+
+    return paginated_response([
         {
-            "date": str(m.date),
-            "mood": m.mood,
-            "activities": m.activities
+            "date": date,
+            "mood": r['mood'],
+            "activities": r.get('activities', [])
         }
-        for m in moods
-    ]), 200
+        for date, r in zip(dates, rows)
+    ], next_cursor)
 
 
 # ----------------------------------------
-# LOG today's mood for this user
+# LOG a mood (today by default) for this user
 # ----------------------------------------
-@moods_bp.route('/', methods=['POST'])
-@authenticate
-def log_mood(current_user):
+MAX_BULK_MOODS = 366
 
-    data = request.get_json()
+def parse_mood_entry(data):
+    """Validate one {mood, activities, date?} payload -> (date, mood, activities); raises ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("Mood entry must be an object")
     mood = data.get("mood")
-    activities = data.get("activities", [])
-
     if not mood:
-        return jsonify({"error": "Mood is required"}), 400
+        raise ValueError("Mood is required")
+    try:
+        mood = int(mood)
+    except (TypeError, ValueError):
+        raise ValueError("Mood must be a number from 1 to 5")
+    if not 1 <= mood <= 5:
+        raise ValueError("Mood must be a number from 1 to 5")
+
+    activities = data.get("activities") or []
+    if not isinstance(activities, list):
+        raise ValueError("Activities must be a list")
+    # Blank names carry nothing and would make an empty rollup key
+    activities = [str(a) for a in activities if str(a).strip()]
+
+    day = datetime.date.today()
+    if data.get("date"):
+        try:
+            day = datetime.date.fromisoformat(str(data["date"])[:10])
+        except ValueError:
+            raise ValueError("Date must be YYYY-MM-DD")
+        if day > datetime.date.today():
+            raise ValueError("Cannot log a mood for a future date")
+    return day, mood, activities
 
-    today = datetime.date.today()
 
-    existing = Mood.objects(user_id=str(current_user.id), date=today).first()
+def upsert_mood(user_id, day, mood, activities):
+    """Create or replace the mood for (user_id, day) in one atomic findAndModify.
 
-    if existing:
-        existing.update(mood=mood, activities=activities)
-        msg = "Mood updated successfully"
-    else:
-        Mood(
-            user_id=str(current_user.id),
-            mood=mood,
-            activities=activities,
-            date=today
-        ).save()
+    Returns the previous document, or None when it was created. The upsert
+    matches the unique (user_id, date) index exactly, so concurrent identical
+    posts are serialized by MongoDB; one retry covers servers older than 4.2
+    that surface the duplicate key instead of retrying internally.
+    """
+    for attempt in range(2):
+        try:
+            return Mood.objects(user_id=user_id, date=day).modify(
+                upsert=True,
+                new=False,
+                set__mood=mood,
+                set__activities=activities,
+                set__updated_at=datetime.datetime.utcnow()
+            )
+        except NotUniqueError:
+            if attempt:
+                raise
+
+
+@moods_bp.route('/', methods=['POST'])
+@authenticate
+def log_mood(current_user):
+
+    data = request.get_json() or {}
+    try:
+        day, mood, activities = parse_mood_entry(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    user_id = str(current_user.id)
+    previous = upsert_mood(user_id, day, mood, activities)
+    created = previous is None
+
+    if created:
+        apply_mood_change(user_id, day, new=(mood, activities))
         msg = "Mood logged successfully"
+    else:
+        apply_mood_change(user_id, day, old=(previous.mood, previous.activities), new=(mood, activities))
+        msg = "Mood updated successfully"
+
+    # Keep the cached AI insight current without making readers wait on Gemini
+    schedule_refresh(user_id)
 
     return jsonify({
         "message": msg,
+        "created": created,
         "mood": mood,
         "activities": activities,
-        "date": str(today)
-    }), 201
-@moods_bp.route('/ai-insights', methods=['GET'])
+        "date": str(day)
+    }), 201 if created else 200
+
+# ----------------------------------------
+# Bulk corrections: many dates in one request
+# ----------------------------------------
+@moods_bp.route('/bulk', methods=['POST'])
 @authenticate
-def ai_insights(current_user):
+def bulk_log_moods(current_user):
+    data = request.get_json() or {}
+    entries = data.get("entries")
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "entries must be a non-empty list"}), 400
+    if len(entries) > MAX_BULK_MOODS:
+        return jsonify({"error": f"At most {MAX_BULK_MOODS} entries per request"}), 400
+
+    parsed = {}
+    errors = []
+    for i, entry in enumerate(entries):
+        try:
+            day, mood, activities = parse_mood_entry(entry)
+            parsed[day] = (mood, activities) # Last entry wins for repeated dates
+        except ValueError as e:
+            errors.append({"index": i, "error": str(e)})
+    if errors:
+        return jsonify({"error": "Invalid entries", "details": errors}), 400
+
+    user_id = str(current_user.id)
+    result = bulk_upsert_moods(user_id, parsed)
+    rebuild_rollups(user_id, parsed.keys())
+    schedule_refresh(user_id)
+
+    return jsonify({
+        "message": "Moods saved",
+        "created": result.upserted_count,
+        "updated": result.modified_count
+    }), 200
+
+# ----------------------------------------
+# Streaming bulk export / import (NDJSON or CSV)
+# ----------------------------------------
+IMPORT_BATCH_SIZE = 500
+
+def _bulk_format():
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+    return fmt if fmt in FORMATS else None
+
+def _stream(lines, fmt, filename):
+    return Response(
+        stream_with_context(lines),
+        mimetype=MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}.{fmt}"}
+    )
+
+@moods_bp.route('/export', methods=['GET'])
+@authenticate
+def export_moods(current_user):
+    """All moods as NDJSON or CSV, streamed from a cursor in constant memory"""
+    fmt = _bulk_format()
+    if not fmt:
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+
+    cursor = Mood._get_collection().find(
+        {"user_id": str(current_user.id)},
+        {"_id": 0, "date": 1, "mood": 1, "activities": 1}
+    ).sort("date", 1).batch_size(1000)
+
+    def records():
+        for doc in cursor:
+            activities = doc.get("activities") or []
+            yield {
+                "date": str(doc["date"].date()),
+                "mood": doc["mood"],
+                "activities": ";".join(map(str, activities)) if fmt == 'csv' else activities
+            }
+
+    lines = csv_lines(records(), ["date", "mood", "activities"]) if fmt == 'csv' else ndjson_lines(records())
+    return _stream(lines, fmt, "mindcare_moods")
+
+@moods_bp.route('/import', methods=['POST'])
+@authenticate
+def import_moods(current_user):
     """
-    Returns an AI-generated summary about last 30 days of moods.
-    If Gemini client is available via environment, tries to call it; otherwise returns a computed summary.
+    Streamed NDJSON ({"date", "mood", "activities"}) or CSV (date,mood,activities
+    with ';'-separated activities). Valid lines are upserted in batches; invalid
+    ones are reported by line number.
     """
-    # collect last 30 days (or all) moods for user
-    thirty_days_ago = datetime.date.today() - datetime.timedelta(days=30)
-    moods = Mood.objects(user_id=str(current_user.id), date__gte=thirty_days_ago).order_by('date')
-
-    payload_text = []
-    values = []
-    for m in moods:
-        payload_text.append(f"{m.date.isoformat()}: mood={m.mood}; activities={','.join(m.activities or [])}")
-        values.append(m.mood)
-
-    summary_text = "No data available for the last 30 days."
-    if moods:
-        # Try to call Gemini (if configured)
+    fmt = _bulk_format()
+    if not fmt:
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+
+    user_id = str(current_user.id)
+    errors = ErrorReport()
+    batch = {}
+    days = set()
+    created = updated = 0
+
+    def flush():
+        nonlocal created, updated
+        if batch:
+            result = bulk_upsert_moods(user_id, batch)
+            created += result.upserted_count
+            updated += result.modified_count
+            days.update(batch)
+            batch.clear()
+
+    for line_number, record in iter_records(request.stream, fmt):
+        if isinstance(record, ValueError):
+            errors.add(line_number, record)
+            continue
+        if fmt == 'csv' and isinstance(record.get("activities"), str):
+            record["activities"] = [a for a in record["activities"].split(";") if a]
+        if not record.get("date"):
+            errors.add(line_number, "Date is required")
+            continue
         try:
-            # Attempt import and client initialization if GEMINI_KEY present
-            from google import genai
-            GEMINI_KEY = os.getenv("GEMINI_API_KEY_1")
-            client = genai.Client(api_key=GEMINI_KEY) if GEMINI_KEY else None
-
-            prompt = f"""
-You are an empathetic mental-health assistant. Analyze the user’s last 30 days of mood logs:
-
-Each entry is:
-(date → mood level 1–5 → activities)
-{chr(10).join(payload_text)}
-
-Please generate a rich, helpful analysis in **structured JSON** with these keys:
-
-{
-  "summary": "One paragraph emotional analysis.",
-  "trend": "increasing | decreasing | stable | mixed",
-  "patterns": "Patterns you see between activities and mood.",
-  "possible_causes": "Possible life or emotional triggers based on data.",
-  "suggestions": "Clear, positive, actionable advice (3–5 lines).",
-  "warnings": "Gentle warnings ONLY if mood has been low consistently."
-}
-
-Be kind, supportive, and non-judgmental.
-Keep the tone warm and human.
-"""
-
-            if client:
-                response = client.models.generate_content(
-                    model=os.getenv("MOOD_AI_MODEL", "gemini-2.5-flash"),
-                    contents=prompt
-                )
-                # response.text may be available
-                summary_text = response.text.strip() if getattr(response, "text", None) else str(response)
-            else:
-                raise Exception("genai client not configured")
-        except Exception as e:
-            # Fallback local summary
-            avg = sum(values) / len(values)
-            if avg >= 4:
-                trend = "generally positive"
-                suggestion = "Keep doing what you're doing. Maintain activities that boost mood."
-            elif avg >= 3:
-                trend = "stable"
-                suggestion = "Try adding small exercise or social time to lift mood."
-            else:
-                trend = "lower than usual"
-                suggestion = "Consider reaching out to support or booking a professional appointment."
-            summary_text = {
-                "summary": f"In the last {len(values)} recorded day(s) your average mood is {avg:.2f}.",
-                "trend": trend,
-                "suggestion": suggestion
+            day, mood, activities = parse_mood_entry(record)
+        except ValueError as e:
+            errors.add(line_number, e)
+            continue
+        batch[day] = (mood, activities)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+    flush()
+
+    if days:
+        rebuild_rollups(user_id, days)
+        schedule_refresh(user_id)
+
+    return jsonify({"created": created, "updated": updated, **errors.to_dict()}), 200
+
+@moods_bp.route('/journal/export', methods=['GET'])
+@authenticate
+def export_journal(current_user):
+    """Journal entries as NDJSON or CSV (timeline JSON-encoded in CSV)"""
+    fmt = _bulk_format()
+    if not fmt:
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+
+    cursor = JournalEntry._get_collection().find(
+        {"user_id": str(current_user.id)}
+    ).sort("created_at", 1).batch_size(100)
+
+    def records():
+        for doc in cursor:
+            timeline = decode_timeline(doc.get("timeline_compact")) or doc.get("timeline") or []
+            yield {
+                "id": str(doc["_id"]),
+                "date": doc["created_at"].isoformat(),
+                "dominant_emotion": doc.get("dominant_emotion"),
+                "summary": doc.get("analysis_summary") or "",
+                "transcript": doc.get("transcript") or "",
+                "timeline": json.dumps(timeline) if fmt == 'csv' else timeline
             }
 
-    return jsonify({"insights": summary_text}), 200
+    fields = ["id", "date", "dominant_emotion", "summary", "transcript", "timeline"]
+    lines = csv_lines(records(), fields) if fmt == 'csv' else ndjson_lines(records())
+    return _stream(lines, fmt, "mindcare_journal")
+
+MAX_TIMELINE_SECONDS = (2 ** 32 - 1) / 10 # timeline_codec stores uint32 deciseconds
+
+def _check_timeline(timeline):
+    """Reject points encode_timeline cannot pack, before anything is written"""
+    if not isinstance(timeline, list):
+        raise ValueError("timeline must be a list")
+    for i, point in enumerate(timeline):
+        if not isinstance(point, dict):
+            raise ValueError(f"timeline[{i}] must be an object")
+        if point.get('emotion') not in EMOTIONS:
+            raise ValueError(f"timeline[{i}].emotion must be one of " + ", ".join(EMOTIONS))
+        t = float(point.get('time'))
+        if not math.isfinite(t) or not 0 <= t <= MAX_TIMELINE_SECONDS:
+            raise ValueError(f"timeline[{i}].time must be a non-negative number of seconds")
+        c = float(point.get('confidence', 0))
+        if not math.isfinite(c) or not 0 <= c <= 1:
+            raise ValueError(f"timeline[{i}].confidence must be between 0 and 1")
+
+@moods_bp.route('/journal/import', methods=['POST'])
+@authenticate
+def import_journal(current_user):
+    """Streamed NDJSON/CSV journal entries, validated per line and written with insert_many"""
+    fmt = _bulk_format()
+    if not fmt:
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+
+    user_id = str(current_user.id)
+    collection = JournalEntry._get_collection()
+    errors = ErrorReport()
+    batch = []
+    imported = 0
+
+    for line_number, record in iter_records(request.stream, fmt):
+        if isinstance(record, ValueError):
+            errors.add(line_number, record)
+            continue
+        try:
+            timeline = record.get("timeline") or []
+            if isinstance(timeline, str):
+                timeline = json.loads(timeline)
+            _check_timeline(timeline)
+            compact = encode_timeline(timeline) if timeline else None
+            dominant = record.get("dominant_emotion") or (dominant_emotion(compact) if compact else None)
+            if dominant not in EMOTIONS:
+                raise ValueError("dominant_emotion must be one of " + ", ".join(EMOTIONS))
+            created_at = datetime.datetime.fromisoformat(record["date"]) if record.get("date") else datetime.datetime.utcnow()
+        except (ValueError, TypeError, KeyError, OverflowError) as e:
+            errors.add(line_number, e)
+            continue
+
+        doc = {
+            "user_id": user_id,
+            "created_at": created_at,
+            "dominant_emotion": dominant,
+            "transcript": str(record.get("transcript") or ""),
+            "analysis_summary": str(record.get("summary") or "")
+        }
+        if compact:
+            doc["timeline_compact"] = compact
+        batch.append(doc)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            imported += len(collection.insert_many(batch, ordered=False).inserted_ids)
+            batch = []
+    if batch:
+        imported += len(collection.insert_many(batch, ordered=False).inserted_ids)
+
+    return jsonify({"imported": imported, **errors.to_dict()}), 200
+
+# ----------------------------------------
+# Weekly / monthly aggregates (O(1) documents per request)
+# ----------------------------------------
+@moods_bp.route('/rollups', methods=['GET'])
+@authenticate
+def get_mood_rollups(current_user):
+    period = request.args.get('period', 'week')
+    if period not in ('week', 'month'):
+        return jsonify({"error": "period must be 'week' or 'month'"}), 400
+    limit = min(max(request.args.get('limit', default=12, type=int), 1), 104)
+
+    rollups = get_rollups(str(current_user.id), period, limit)
+    return jsonify([r.to_dict() for r in rollups]), 200
+
+# ----------------------------------------
+# Trend / seasonality / activity statistics
+# ----------------------------------------
+@moods_bp.route('/analytics', methods=['GET'])
+@authenticate
+def get_mood_analytics(current_user):
+    days = request.args.get('days', default=365, type=int) # 0 = full history
+    if days < 0:
+        return jsonify({"error": "days must be >= 0"}), 400
+    return jsonify(user_analytics(str(current_user.id), days or None)), 200
+
+@moods_bp.route('/ai-insights', methods=['GET'])
+@authenticate
+def ai_insights(current_user):
+    """
+    Returns an AI-generated summary about last 30 days of moods.
+    The stored insight is served while the mood data is unchanged and younger
+    than the TTL; otherwise it is regenerated in the background and the
+    previous (or locally computed) summary is returned. ?refresh=true
+    regenerates synchronously.
+    """
+    user_id = str(current_user.id)
+    version, moods = load_inputs(user_id)
+    if not moods:
+        return jsonify({"insights": NO_DATA_MESSAGE}), 200
+
+    if request.args.get('refresh', 'false').lower() in ('1', 'true', 'yes'):
+        return jsonify({"insights": generate_insights(user_id, version, moods), "cached": False}), 200
+
+    cached = MoodInsight.objects(user_id=user_id).first()
+    if is_fresh(cached, version):
+        return jsonify({"insights": cached.insights, "cached": True}), 200
+
+    schedule_refresh(user_id)
+    if cached is not None and cached.version == version:
+        # Same data, the stored insight has only outlived its TTL
+        return jsonify({"insights": cached.insights, "cached": True, "stale": True}), 200
+    return jsonify({
+        "insights": local_summary([m['mood'] for m in moods]),
+        "cached": False,
+        "pending": True
+    }), 200
 
 @moods_bp.route('/export-pdf', methods=['GET'])
 @authenticate
 def export_mood_pdf(current_user):
     """
-    Returns a PDF report for the last 30 days for the logged-in user.
+    Returns a PDF report for the logged-in user.
+    Optional ?start=YYYY-MM-DD&end=YYYY-MM-DD (defaults to the last 30 days).
+    Reports are rendered to disk and reused until moods in the range change.
     """
-    # collect moods
-    thirty_days_ago = datetime.date.today() - datetime.timedelta(days=30)
-    moods = Mood.objects(user_id=str(current_user.id), date__gte=thirty_days_ago).order_by('date')
+    try:
+        end = datetime.date.fromisoformat(request.args['end']) if request.args.get('end') else datetime.date.today()
+        start = datetime.date.fromisoformat(request.args['start']) if request.args.get('start') else end - datetime.timedelta(days=30)
+    except ValueError:
+        return jsonify({"error": "start and end must be YYYY-MM-DD dates"}), 400
+    if start > end:
+        return jsonify({"error": "start must not be after end"}), 400
+    if (end - start).days > MAX_REPORT_DAYS:
+        return jsonify({"error": f"Date range cannot exceed {MAX_REPORT_DAYS} days"}), 400
 
-    # generate PDF in-memory using reportlab
     try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.units import inch
+        import reportlab  # noqa: F401
     except Exception as e:
         return jsonify({"error": "reportlab is required on server for PDF export"}), 500
 
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-
-    # Header
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(72, height - 72, "MindCare — Mood Report (Last 30 days)")
-
-    c.setFont("Helvetica", 10)
-    c.drawString(72, height - 94, f"Generated: {datetime.datetime.now().isoformat()}")
-    c.drawString(72, height - 110, f"User ID: {current_user}")
-
-    # Table header
-    y = height - 140
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(72, y, "Date")
-    c.drawString(180, y, "Mood (1-5)")
-    c.drawString(260, y, "Activities")
-    c.line(72, y - 4, width - 72, y - 4)
-    y -= 18
-
-    c.setFont("Helvetica", 10)
-    for m in moods:
-        if y < 100:
-            c.showPage()
-            y = height - 72
-        c.drawString(72, y, str(m.date))
-        c.drawString(180, y, str(m.mood))
-        activities_str = ", ".join(m.activities or [])
-        c.drawString(260, y, activities_str[:80])
-        y -= 16
-
-    # Simple summary
-    y -= 10
-    if moods:
-        values = [m.mood for m in moods]
-        avg = sum(values) / len(values)
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(72, y, f"Average mood (last {len(values)} days): {avg:.2f}")
-    else:
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(72, y, "No mood entries found in past 30 days.")
-
-    c.save()
-    buffer.seek(0)
+    path = get_report(str(current_user.id), current_user.name, start, end)
 
-    # send as attachment
+    # send_file streams from disk and supports conditional/range requests
     return send_file(
-        buffer,
+        path,
         as_attachment=True,
-        download_name="mindcare_mood_report.pdf",
-        mimetype="application/pdf"
+        download_name=f"mindcare_mood_report_{start}_{end}.pdf",
+        mimetype="application/pdf",
+        conditional=True
     )
 
 # ----------------------------------------
@@ -253,6 +525,21 @@ def analyze_video(current_user):
     
     file = request.files['video']
     transcript_text = request.form.get('transcript', '') # Get text from frontend
+    # Parallel segment analysis for long videos (capped by MAX_VIDEO_WORKERS)
+    workers = request.form.get('workers', default=int(os.getenv("VIDEO_ANALYSIS_WORKERS", 1)), type=int)
+
+    # Per-request sampling policy: 'fixed' (default, 1 FPS) or 'adaptive'
+    try:
+        sampling = make_sampling_policy(
+            mode=request.form.get('sampling') or None,
+            interval=request.form.get('interval') or None,
+            coarse_interval=request.form.get('coarse_interval') or None,
+            min_interval=request.form.get('min_interval') or None
+        )
+        # Optional client-side face detections: [{"time": 1.0, "box": [x, y, w, h]}, ...]
+        face_boxes = parse_face_boxes(request.form['face_boxes']) if request.form.get('face_boxes') else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     fd, temp_path = tempfile.mkstemp(suffix='.webm')
     os.close(fd) 
@@ -261,26 +548,25 @@ def analyze_video(current_user):
         file.save(temp_path)
         
         # 1. Process Video
-        timeline = detector.process_video(temp_path)
+        timeline = detector.process_video(temp_path, workers=workers, sampling=sampling, face_boxes=face_boxes)
         
         if not timeline:
             return jsonify({"error": "No face detected in video"}), 422
             
-        emotions = [t['emotion'] for t in timeline]
-        dominant = max(set(emotions), key=emotions.count)
+        compact = encode_timeline(timeline)
+        dominant = dominant_emotion(compact)
         
         # Calculate avg confidence
-        confidences = [t.get('confidence', 0) for t in timeline]
-        avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+        avg_confidence = average_confidence(compact)
         
         # 2. Generate Summary
-        summary = generate_narrative(timeline)
+        summary = generate_narrative(compact)
         
         # 3. Save to DB with new fields
         entry = JournalEntry(
             user_id=str(current_user.id),
             dominant_emotion=dominant,
-            timeline=timeline,
+            timeline_compact=compact,
             transcript=transcript_text,       # <--- Saved
             analysis_summary=summary          # <--- Saved
         )
@@ -307,37 +593,152 @@ def analyze_video(current_user):
 # ----------------------------------------
 # Journal History 
 # ----------------------------------------
+JOURNAL_PAGE_SIZE = 10
+MAX_JOURNAL_PAGE_SIZE = 50
+MAX_SPARKLINE_POINTS = 200
+
 @moods_bp.route('/journal-history', methods=['GET'])
 @authenticate
 def get_journal_history(current_user):
+    """
+    Newest-first list of journal entries with summary fields only.
+    ?limit=N, ?before=<X-Next-Cursor value>, ?points=N adds a downsampled
+    timeline ("sparkline") per entry. Full data: GET /journal/<entry_id>.
+    """
+    limit = parse_limit(JOURNAL_PAGE_SIZE, MAX_JOURNAL_PAGE_SIZE)
+    points = min(max(request.args.get('points', default=0, type=int), 0), MAX_SPARKLINE_POINTS)
     try:
-        entries = JournalEntry.objects(user_id=str(current_user.id)).order_by('-created_at').limit(10)
-        
-        return jsonify([{
-            "id": str(e.id),
-            "date": e.created_at.isoformat(),
-            "dominant_emotion": e.dominant_emotion,
-            "timeline": e.timeline,
-            "summary": e.analysis_summary if hasattr(e, 'analysis_summary') else "No summary available.",
-            "transcript": e.transcript if hasattr(e, 'transcript') else ""
-        } for e in entries]), 200
+        query = JournalEntry.objects(user_id=str(current_user.id))
+        if request.args.get('before'):
+            query = query.filter(__raw__=before_cursor('created_at', request.args['before']))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    try:
+        fields = ['id', 'created_at', 'dominant_emotion', 'analysis_summary']
+        if points:
+            fields += ['timeline_compact', 'timeline']
+        entries = list(query.order_by('-created_at', '-id').only(*fields).limit(limit + 1))
+        entries, has_more = page(entries, limit)
+
+        result = []
+        for e in entries:
+            item = {
+                "id": str(e.id),
+                "date": e.created_at.isoformat(),
+                "dominant_emotion": e.dominant_emotion,
+                "summary": e.analysis_summary or "No summary available."
+            }
+            if points:
+                item["sparkline"] = e.get_sparkline(points)
+            result.append(item)
+
+        next_cursor = encode_cursor(entries[-1].created_at, entries[-1].id) if has_more else None
+        return paginated_response(result, next_cursor)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@moods_bp.route('/journal/<entry_id>', methods=['GET'])
+@authenticate
+def get_journal_entry(current_user, entry_id):
+    """Full journal entry: timeline, transcript and summary"""
+    if not ObjectId.is_valid(entry_id):
+        return jsonify({"error": "Invalid entry ID"}), 400
+    e = JournalEntry.objects(id=entry_id, user_id=str(current_user.id)).first()
+    if not e:
+        return jsonify({"error": "Journal entry not found"}), 404
+
+    # Legacy list-timeline entries are encoded on the fly, as get_sparkline does
+    compact = e.timeline_compact or encode_timeline(e.timeline or [])
+    return jsonify({
+        "id": str(e.id),
+        "date": e.created_at.isoformat(),
+        "dominant_emotion": e.dominant_emotion,
+        "timeline": e.get_timeline(),
+        "avg_confidence": average_confidence(compact),
+        "summary": e.analysis_summary or "No summary available.",
+        "transcript": e.transcript or ""
+    }), 200
 # ----------------------------------------
 
 @moods_bp.route('/detect-emotion', methods=['POST'])
 @authenticate
 def detect_emotion_api(current_user):
+    # Reject oversized uploads before the multipart body is even parsed
+    # (64 KB of slack for multipart headers and boundaries)
+    if request.content_length and request.content_length > MAX_SNAPSHOT_BYTES + 64 * 1024:
+        return jsonify({"error": "Image too large"}), 413
+
     if 'image' not in request.files:
         return jsonify({"error": "No image uploaded"}), 400
     
     file = request.files['image']
+    # Optional client-side detection: the image is already a face crop, or a face box is given
+    pre_cropped = request.form.get('pre_cropped', 'false').lower() in ('1', 'true', 'yes')
     
     try:
-        result = detector.detect(file)
+        face_box = parse_face_box(request.form['face_box']) if request.form.get('face_box') else None
+        result = detector.detect(file, face_box=face_box, pre_cropped=pre_cropped)
         if result:
             return jsonify(result), 200
         else:
             return jsonify({"error": "No face detected"}), 422
+    except PayloadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+@moods_bp.route('/detect-emotion/batch', methods=['POST'])
+@authenticate
+def detect_emotion_batch_api(current_user):
+    """
+    Many frames in one request and one forward pass. Accepts either
+    multipart 'images' files (optional 'face_boxes' JSON list aligned with them,
+    null for "detect on server") or an application/octet-stream body of
+    [4-byte big-endian length][image bytes] records.
+    """
+    if request.content_length and request.content_length > MAX_BATCH_BYTES:
+        return jsonify({"error": "Batch too large"}), 413
+
+    pre_cropped = request.args.get('pre_cropped', request.form.get('pre_cropped', 'false')).lower() in ('1', 'true', 'yes')
+
+    try:
+        face_boxes = None
+        if request.mimetype == 'application/octet-stream':
+            frames = unpack_frames(request.get_data(cache=False), MAX_BATCH_FRAMES, MAX_SNAPSHOT_BYTES)
+        else:
+            frames = request.files.getlist('images')
+            if len(frames) > MAX_BATCH_FRAMES:
+                return jsonify({"error": f"At most {MAX_BATCH_FRAMES} frames per request"}), 400
+            if request.form.get('face_boxes'):
+                raw_boxes = json.loads(request.form['face_boxes'])
+                if not isinstance(raw_boxes, list) or len(raw_boxes) != len(frames):
+                    return jsonify({"error": "face_boxes must be a list with one entry per image"}), 400
+                face_boxes = [parse_face_box(b) if b is not None else None for b in raw_boxes]
+
+        if not frames:
+            return jsonify({"error": "No images uploaded"}), 400
+
+        results = detector.detect_batch(frames, face_boxes=face_boxes, pre_cropped=pre_cropped)
+    except PayloadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    detected = [r for r in results if r]
+    aggregate = {
+        "frames": len(results),
+        "faces_detected": len(detected),
+        "dominant_emotion": None,
+        "mean_mapped_mood": None
+    }
+    if detected:
+        emotions = Counter(r['emotion'] for r in detected)
+        aggregate["dominant_emotion"] = emotions.most_common(1)[0][0]
+        aggregate["mean_mapped_mood"] = sum(r['mapped_mood'] for r in detected) / len(detected)
+
+    return jsonify({"results": results, "aggregate": aggregate}), 200
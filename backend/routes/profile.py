@@ -3,6 +3,7 @@ from models.User import User
 from mongoengine.errors import ValidationError, DoesNotExist
 from werkzeug.security import generate_password_hash, check_password_hash
 from middleware.auth import authenticate # Ensure you have this imported
+from utils.buddy_index import index as buddy_index, validate_interests
 
 profile_bp = Blueprint('profile_bp', __name__)
 
@@ -71,6 +72,13 @@ def update_profile(current_user, user_id):
             "bio", "avatar_seed", "interests"
         ]
         
+        if "interests" in data:
+            # Capped: they feed every worker's in-memory buddy index
+            try:
+                data["interests"] = validate_interests(data["interests"])
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
         for field in allowed_fields:
             if field in data:
                 setattr(user, field, data[field])
@@ -82,6 +90,9 @@ def update_profile(current_user, user_id):
             
         user.save()
 
+        if "interests" in data:
+            buddy_index.update_user(user.id, user.interests, user.role == 'user')
+
         # Return the FULL updated user object so Frontend updates immediately
         return jsonify({
             "message": "Profile updated successfully",
@@ -0,0 +1,252 @@
+# utils/buddy_index.py
+# In-memory interest matrix for buddy recommendations.
+#
+# Each user is one bit-packed row over the interest vocabulary (np.packbits
+# layout: column c is bit 7 - c % 8 of byte c // 8). Scoring every candidate
+# gathers only the query's columns, and the top-k is a partial partition.
+# The index is built lazily from Mongo, patched in place when a profile changes
+# (update_user) and rebuilt after BUDDY_INDEX_TTL seconds so other workers'
+# edits and new sign-ups eventually show up.
+#
+# Memory is bounded: interests are capped per user on write (validate_interests)
+# and the vocabulary holds at most MAX_VOCABULARY columns. Users' tags are
+# stored as typed; case and whitespace are folded only inside the index. Rebuilds compact it to
+# the most widely shared interests; until then, brand-new interests beyond the
+# cap are simply not indexed (they cannot overlap with anyone yet anyway).
+import os
+import threading
+import time
+from collections import Counter
+import numpy as np
+
+BUDDY_INDEX_TTL = int(os.getenv("BUDDY_INDEX_TTL", 600))
+MAX_VOCABULARY = int(os.getenv("BUDDY_INDEX_MAX_VOCABULARY", 4096))
+MAX_INTERESTS = 20
+MAX_INTEREST_LENGTH = 40
+METRICS = ('jaccard', 'weighted', 'overlap')
+
+
+def validate_interests(interests):
+    """Check a profile's interests before they are saved (unchanged, as typed).
+
+    Raises ValueError for non-lists, over-long tags or more than MAX_INTERESTS.
+    """
+    if interests is None:
+        return []
+    if not isinstance(interests, list):
+        raise ValueError("interests must be a list")
+    if len(interests) > MAX_INTERESTS:
+        raise ValueError(f"At most {MAX_INTERESTS} interests are allowed")
+    if any(len(str(item).strip()) > MAX_INTEREST_LENGTH for item in interests):
+        raise ValueError(f"Each interest must be at most {MAX_INTEREST_LENGTH} characters")
+    return interests
+
+
+def _normalize(interests):
+    # Index form: stripped, lower-case, unique. Lenient for existing data: never raises
+    tags = {" ".join(str(i).split()).lower() for i in interests or []}
+    return sorted(t for t in tags if t and len(t) <= MAX_INTEREST_LENGTH)[:MAX_INTERESTS]
+
+
+class InterestIndex:
+    def __init__(self, rows=1024, cols=64, max_vocabulary=MAX_VOCABULARY):
+        self._lock = threading.RLock()
+        self.max_vocabulary = max_vocabulary
+        self._reset(rows, cols)
+
+    def _reset(self, rows=1024, cols=64):
+        cols = min(cols, self.max_vocabulary)
+        self.bits = np.zeros((rows, (cols + 7) // 8), dtype=np.uint8)
+        self.sizes = np.zeros(rows, dtype=np.int32)       # interests per user
+        self.active = np.zeros(rows, dtype=bool)          # live, matchable rows
+        self.doc_freq = np.zeros(cols, dtype=np.int64)    # users per interest
+        self.vocab = {}                                   # interest -> column
+        self.ids = []                                     # row -> user id
+        self.row_of = {}                                  # user id -> row
+        self.built_at = None
+
+    # --- building ---------------------------------------------------------
+
+    def _grow(self, rows=None, cols=None):
+        r, width = self.bits.shape
+        rows = max(rows or r, r)
+        cols = min(max(cols or 0, len(self.doc_freq)), self.max_vocabulary)
+        new_width = max((cols + 7) // 8, width)
+        if rows > r or new_width > width:
+            bits = np.zeros((rows, new_width), dtype=np.uint8)
+            bits[:r, :width] = self.bits
+            self.bits = bits
+        if rows > r:
+            self.sizes = np.concatenate([self.sizes, np.zeros(rows - r, dtype=np.int32)])
+            self.active = np.concatenate([self.active, np.zeros(rows - r, dtype=bool)])
+        if cols > len(self.doc_freq):
+            self.doc_freq = np.concatenate([self.doc_freq, np.zeros(cols - len(self.doc_freq), dtype=np.int64)])
+
+    def _columns(self, interests, create):
+        cols = []
+        for name in interests:
+            col = self.vocab.get(name)
+            if col is None and create and len(self.vocab) < self.max_vocabulary:
+                col = len(self.vocab)
+                if col >= len(self.doc_freq):
+                    self._grow(cols=max(col * 2, 64))
+                self.vocab[name] = col
+            if col is not None:
+                cols.append(col)
+        return np.array(cols, dtype=np.intp)
+
+    @staticmethod
+    def _masks(cols):
+        return (0x80 >> (cols & 7)).astype(np.uint8)
+
+    def _row_columns(self, row):
+        return np.flatnonzero(np.unpackbits(self.bits[row])[:len(self.doc_freq)])
+
+    def load(self, users):
+        """Replace the index with [(user_id, interests, matchable)].
+
+        The vocabulary is compacted to the MAX_VOCABULARY most widely shared
+        interests; interests nobody else has cannot produce a match.
+        """
+        with self._lock:
+            users = [(user_id, _normalize(interests), matchable) for user_id, interests, matchable in users]
+            freq = Counter(tag for _, tags, _ in users for tag in tags)
+            keep = sorted(freq, key=lambda tag: (-freq[tag], tag))[:self.max_vocabulary]
+            self._reset(rows=max(len(users), 1024), cols=max(len(keep), 64))
+            self.vocab = {tag: col for col, tag in enumerate(keep)}
+            for user_id, tags, matchable in users:
+                self._set(user_id, tags, matchable)
+            self.built_at = time.monotonic()
+
+    def _clear_row(self, row):
+        self.doc_freq[self._row_columns(row)] -= 1
+        self.bits[row] = 0
+        self.sizes[row] = 0
+
+    def _set(self, user_id, interests, matchable=True):
+        row = self.row_of.get(user_id)
+        if row is None:
+            row = len(self.ids)
+            if row >= self.bits.shape[0]:
+                self._grow(rows=row * 2)
+            self.ids.append(user_id)
+            self.row_of[user_id] = row
+        else:
+            self._clear_row(row)
+
+        cols = self._columns(_normalize(interests), create=True)
+        np.bitwise_or.at(self.bits[row], cols >> 3, self._masks(cols))
+        self.doc_freq[cols] += 1
+        # Jaccard uses the full interest count, indexed or not
+        self.sizes[row] = len(_normalize(interests))
+        self.active[row] = matchable
+
+    def update_user(self, user_id, interests, matchable=True):
+        """Incremental refresh after a profile edit; no-op until the index is built"""
+        with self._lock:
+            if self.built_at is not None:
+                self._set(str(user_id), interests, matchable)
+
+    def remove_user(self, user_id):
+        """Drop a deleted account from matching (its row is reused on the next rebuild)"""
+        with self._lock:
+            row = self.row_of.get(str(user_id))
+            if row is not None:
+                self._clear_row(row)
+                self.active[row] = False
+
+    # --- querying ---------------------------------------------------------
+
+    def top_k(self, interests, k=20, metric='jaccard', exclude=()):
+        """[(user_id, score, overlap)] for the k best candidates, best first.
+
+        jaccard:  |A∩B| / |A∪B|
+        weighted: IDF-weighted overlap, so rare shared interests count more
+        overlap:  |A∩B| (the ordering the /buddies endpoint uses)
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+        interests = _normalize(interests)
+        with self._lock:
+            n = len(self.ids)
+            if n == 0 or k <= 0:
+                return []
+            cols = self._columns(interests, create=False)
+            # (n, len(cols)) membership, gathered from the packed bytes of the query's columns only
+            hits = (self.bits[:n, cols >> 3] & self._masks(cols)) != 0
+            overlap = hits.sum(axis=1, dtype=np.int32)
+
+            if metric == 'jaccard':
+                union = self.sizes[:n] + len(interests) - overlap
+                score = np.divide(overlap, union, out=np.zeros(n), where=union > 0)
+            elif metric == 'weighted':
+                idf = np.log1p(n / np.maximum(self.doc_freq[cols], 1))
+                score = hits @ idf if len(cols) else np.zeros(n)
+            else:
+                score = overlap.astype(np.float64)
+
+            candidates = self.active[:n].copy()
+            for user_id in exclude:
+                row = self.row_of.get(str(user_id))
+                if row is not None:
+                    candidates[row] = False
+            score = np.where(candidates, score, -np.inf)
+
+            k = min(k, int(candidates.sum()))
+            if k == 0:
+                return []
+            if k < n:
+                # argpartition breaks ties arbitrarily: take everything above the
+                # k-th best score, then the earliest rows tied with it
+                kth = np.partition(score, n - k)[n - k]
+                above = np.flatnonzero(score > kth)
+                top = np.concatenate([above, np.flatnonzero(score == kth)[:k - len(above)]])
+            else:
+                top = np.arange(n)
+            # Deterministic order: score desc, then insertion order
+            top = top[np.lexsort((top, -score[top]))][:k]
+            return [(self.ids[i], float(score[i]), int(overlap[i])) for i in top]
+
+    def is_stale(self):
+        return self.built_at is None or time.monotonic() - self.built_at > BUDDY_INDEX_TTL
+
+
+index = InterestIndex()
+_rebuild_lock = threading.Lock()
+
+
+def _rebuild():
+    from models.User import User
+    # Scan Mongo before load() takes the index lock, so queries keep running meanwhile
+    users = [
+        (str(u['_id']), u.get('interests'), u.get('role', 'user') == 'user')
+        for u in User.objects.only('role', 'interests').as_pymongo()
+    ]
+    index.load(users)
+
+
+def _rebuild_in_background():
+    try:
+        _rebuild()
+    except Exception as e:
+        print("⚠️ Buddy index rebuild failed:", e)
+    finally:
+        _rebuild_lock.release()
+
+
+def get_index():
+    """The process-wide index, built from Mongo on first use.
+
+    Past its TTL it is rebuilt by a single background thread while requests keep
+    using the old one; concurrent callers never start rebuilds of their own.
+    """
+    if index.built_at is None:
+        with _rebuild_lock:
+            if index.built_at is None:
+                _rebuild()
+    elif index.is_stale() and _rebuild_lock.acquire(blocking=False):
+        if index.is_stale():
+            threading.Thread(target=_rebuild_in_background, name="buddy-index-rebuild", daemon=True).start()
+        else:
+            _rebuild_lock.release()
+    return index
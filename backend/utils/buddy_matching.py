@@ -0,0 +1,73 @@
+# utils/buddy_matching.py
+# Server-side buddy ranking: interest overlap is scored inside MongoDB and only
+# one page of candidates ever leaves the database.
+from bson import ObjectId
+from models.User import User
+
+BUDDY_FIELDS = {"name": 1, "age": 1, "interests": 1, "bio": 1, "location": 1, "status": 1}
+
+
+def encode_buddy_cursor(doc):
+    return f"{doc['matchScore']}_{doc['_id']}"
+
+
+def decode_buddy_cursor(cursor):
+    """'<score>_<user id>' -> (score, ObjectId); raises ValueError"""
+    score, _, oid = cursor.partition('_')
+    if not ObjectId.is_valid(oid):
+        raise ValueError("Invalid cursor")
+    return int(score), ObjectId(oid)
+
+
+def _overlapping(me, interests, after, limit):
+    """Users sharing at least one interest, best overlap first.
+
+    The {role, interests} index narrows the scan to users with a shared interest;
+    $setIntersection/$size score them without shipping documents to Python.
+    """
+    pipeline = [
+        {"$match": {"role": "user", "_id": {"$ne": me}, "interests": {"$in": interests}}},
+        {"$addFields": {"matchScore": {"$size": {"$setIntersection": [{"$ifNull": ["$interests", []]}, interests]}}}},
+    ]
+    if after:
+        score, last_id = after
+        pipeline.append({"$match": {"$or": [
+            {"matchScore": {"$lt": score}},
+            {"matchScore": score, "_id": {"$gt": last_id}}
+        ]}})
+    pipeline += [
+        {"$sort": {"matchScore": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": dict(BUDDY_FIELDS, matchScore=1)}
+    ]
+    return list(User._get_collection().aggregate(pipeline))
+
+
+def _non_overlapping(me, interests, after_id, limit):
+    """Everyone else (score 0), in _id order"""
+    query = {"role": "user", "_id": {"$ne": me}}
+    if after_id:
+        query["_id"]["$gt"] = after_id
+    if interests:
+        query["interests"] = {"$nin": interests}
+    docs = list(User._get_collection().find(query, BUDDY_FIELDS).sort("_id", 1).limit(limit))
+    for doc in docs:
+        doc["matchScore"] = 0
+    return docs
+
+
+def ranked_buddies(me, interests, limit, cursor=None):
+    """One page of candidates ranked by shared interests -> (docs, next_cursor)"""
+    interests = list(set(interests or []))
+    after = decode_buddy_cursor(cursor) if cursor else None
+
+    docs = []
+    if interests and (after is None or after[0] > 0):
+        docs = _overlapping(me, interests, after, limit + 1)
+    if len(docs) <= limit:
+        after_id = after[1] if after and after[0] == 0 else None
+        docs += _non_overlapping(me, interests, after_id, limit + 1 - len(docs))
+
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    return docs, (encode_buddy_cursor(docs[-1]) if has_more else None)
@@ -0,0 +1,95 @@
+# utils/bulk_io.py
+# Streaming NDJSON / CSV helpers for bulk import and export.
+import csv
+import io
+import json
+
+FORMATS = ('ndjson', 'csv')
+MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+MAX_REPORTED_ERRORS = 1000
+
+
+def ndjson_lines(records):
+    """Yield one JSON document per line"""
+    for record in records:
+        yield json.dumps(record, default=str) + "\n"
+
+
+def csv_lines(records, fieldnames):
+    """Yield CSV text row by row, reusing one small buffer"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _is_utf8(values):
+    """False when surrogateescape decoding left undecodable bytes in any of values"""
+    try:
+        for value in values:
+            for part in value if isinstance(value, list) else [value]:
+                if isinstance(part, str):
+                    part.encode('utf-8')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def iter_records(binary_stream, fmt):
+    """Yield (line_number, record) from an uploaded body without buffering it.
+
+    record is a dict, or a ValueError describing why the line could not be parsed.
+    Bytes that are not UTF-8 and malformed CSV are reported per line too, never
+    raised mid-import.
+    """
+    # surrogateescape never raises while reading; bad bytes are detected per record
+    text = io.TextIOWrapper(binary_stream, encoding='utf-8', errors='surrogateescape', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                # line_num is not advanced for the line that failed
+                yield reader.line_num + 1, ValueError(f"Invalid CSV: {e}")
+                continue
+            if not _is_utf8(list(row.keys()) + list(row.values())):
+                yield reader.line_num, ValueError("Line is not valid UTF-8")
+                continue
+            yield reader.line_num, row
+
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if not _is_utf8([line]):
+            yield line_number, ValueError("Line is not valid UTF-8")
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e}")
+            continue
+        yield line_number, record if isinstance(record, dict) else ValueError("Each line must be a JSON object")
+
+
+class ErrorReport:
+    """Collects per-line import errors, keeping at most MAX_REPORTED_ERRORS of them"""
+    def __init__(self):
+        self.count = 0
+        self.items = []
+
+    def add(self, line_number, error):
+        self.count += 1
+        if len(self.items) < MAX_REPORTED_ERRORS:
+            self.items.append({"line": line_number, "error": str(error)})
+
+    def to_dict(self):
+        return {"error_count": self.count, "errors": self.items, "errors_truncated": self.count > len(self.items)}
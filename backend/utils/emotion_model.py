@@ -2,6 +2,176 @@ import cv2
 import numpy as np
 import tensorflow as tf
 import os
+import io
+import json
+import math
+import bisect
+import multiprocessing
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+
+# Cap on worker processes for parallel video analysis (shared by all requests)
+MAX_VIDEO_WORKERS = max(1, int(os.getenv("MAX_VIDEO_WORKERS", os.cpu_count() or 1)))
+# Videos are only split when every segment gets at least this many seconds
+MIN_SEGMENT_SECONDS = 10
+
+# Snapshot uploads larger than this are rejected before decoding
+MAX_SNAPSHOT_BYTES = int(os.getenv("MAX_SNAPSHOT_BYTES", 8 * 1024 * 1024))
+# Large snapshots are decoded at 1/2, 1/4 or 1/8 scale while the long side
+# stays at least this big (faces are resized to 224x224 anyway)
+SNAPSHOT_TARGET_SIDE = 960
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# Batch snapshot endpoint limits
+MAX_BATCH_FRAMES = int(os.getenv("MAX_BATCH_FRAMES", 32))
+MAX_BATCH_BYTES = int(os.getenv("MAX_BATCH_BYTES", 32 * 1024 * 1024))
+
+# Client-supplied face boxes: same minimum as the Haar cascade's minSize
+MIN_FACE_SIZE = 30
+# A video face box applies to sampled frames at most this many seconds away
+FACE_BOX_TOLERANCE = 0.5
+
+# Sampling policies accepted by process_video
+SAMPLING_MODES = ("fixed", "adaptive")
+DEFAULT_SAMPLING = {
+    "mode": "fixed",
+    "interval": 1.0,         # fixed: seconds between samples
+    "coarse_interval": 2.5,  # adaptive: seconds between first-pass samples
+    "min_interval": 0.5      # adaptive: finest spacing when refining a change
+}
+MAX_ADAPTIVE_RATIO = 16 # adaptive: coarse_interval / min_interval, bounds the frames held in memory
+
+_video_pool = None
+
+class PayloadTooLarge(ValueError):
+    """Raised when an upload exceeds MAX_SNAPSHOT_BYTES"""
+
+def unpack_frames(data, max_frames, max_frame_bytes):
+    """Split a binary-packed body (4-byte big-endian length + image bytes, repeated)
+    into file-like objects; raises ValueError/PayloadTooLarge on malformed input"""
+    frames = []
+    view = memoryview(data)
+    offset = 0
+    while offset < len(view):
+        if offset + 4 > len(view):
+            raise ValueError("Truncated frame header")
+        length = int.from_bytes(view[offset:offset + 4], 'big')
+        offset += 4
+        if length > max_frame_bytes:
+            raise PayloadTooLarge(f"Frame {len(frames)} exceeds {max_frame_bytes} bytes")
+        if offset + length > len(view):
+            raise ValueError(f"Frame {len(frames)} is truncated")
+        frames.append(io.BytesIO(view[offset:offset + length]))
+        offset += length
+        if len(frames) > max_frames:
+            raise ValueError(f"At most {max_frames} frames per request")
+    return frames
+
+def make_sampling_policy(mode=None, interval=None, coarse_interval=None, min_interval=None):
+    """Build a validated sampling policy; raises ValueError on bad input"""
+    policy = dict(DEFAULT_SAMPLING)
+    if mode is not None:
+        policy["mode"] = mode
+    if interval is not None:
+        policy["interval"] = float(interval)
+    if coarse_interval is not None:
+        policy["coarse_interval"] = float(coarse_interval)
+    if min_interval is not None:
+        policy["min_interval"] = float(min_interval)
+
+    if policy["mode"] not in SAMPLING_MODES:
+        raise ValueError(f"sampling mode must be one of {', '.join(SAMPLING_MODES)}")
+    if not 0.1 <= policy["interval"] <= 60:
+        raise ValueError("interval must be between 0.1 and 60 seconds")
+    if not 0.1 <= policy["min_interval"] <= policy["coarse_interval"] <= 60:
+        raise ValueError("need 0.1 <= min_interval <= coarse_interval <= 60 seconds")
+    # Adaptive scans buffer up to coarse/min decoded frames; keep that bounded
+    policy["min_interval"] = max(policy["min_interval"], policy["coarse_interval"] / MAX_ADAPTIVE_RATIO)
+    return policy
+
+def parse_face_box(raw):
+    """Parse a client face box ("x,y,w,h", JSON list or sequence) into 4 ints; raises ValueError"""
+    if isinstance(raw, str):
+        raw = raw.strip()
+        raw = json.loads(raw) if raw.startswith('[') else raw.split(',')
+    try:
+        values = [float(v) for v in raw]
+    except (TypeError, ValueError):
+        raise ValueError("face box must be four numbers: x, y, w, h")
+    # inf / nan would overflow (or fail) the int conversion below
+    if len(values) != 4 or not all(math.isfinite(v) for v in values):
+        raise ValueError("face box must be four numbers: x, y, w, h")
+    box = tuple(int(v) for v in values)
+    problem = _face_box_problem(*box)
+    if problem:
+        raise ValueError(problem)
+    return box
+
+def _face_box_problem(x, y, w, h):
+    """Why a client face box (or pre-cropped frame) is unusable, or None"""
+    if x < 0 or y < 0 or w < MIN_FACE_SIZE or h < MIN_FACE_SIZE:
+        return f"face box must be non-negative and at least {MIN_FACE_SIZE}px wide and tall"
+    if not 0.5 <= w / h <= 2:
+        return "face box aspect ratio must be between 1:2 and 2:1"
+    return None
+
+def parse_face_boxes(raw):
+    """Parse a JSON list of {"time": seconds, "box": [x, y, w, h]} into a time-sorted list"""
+    try:
+        items = json.loads(raw) if isinstance(raw, str) else raw
+        boxes = [(float(item["time"]), parse_face_box(item["box"])) for item in items]
+    except (TypeError, KeyError, json.JSONDecodeError):
+        raise ValueError('face_boxes must be a JSON list of {"time": seconds, "box": [x, y, w, h]}')
+    if not all(math.isfinite(t) for t, _ in boxes):
+        raise ValueError("face box times must be finite")
+    return sorted(boxes)
+
+def _clip_box(box, shape, scale=1.0):
+    """Scale a box to the decoded frame and clip it to the image; None if too little is left"""
+    x, y, w, h = (int(round(v * scale)) for v in box)
+    height, width = shape[:2]
+    x2, y2 = min(x + w, width), min(y + h, height)
+    if x2 - x < MIN_FACE_SIZE * scale or y2 - y < MIN_FACE_SIZE * scale:
+        return None
+    return (x, y, x2 - x, y2 - y)
+
+def _nearest_box(face_boxes, timestamp):
+    """Client box closest in time to timestamp, within FACE_BOX_TOLERANCE"""
+    if not face_boxes:
+        return None
+    i = bisect.bisect_left(face_boxes, (timestamp,))
+    candidates = face_boxes[max(0, i - 1):i + 1]
+    t, box = min(candidates, key=lambda item: abs(item[0] - timestamp))
+    return box if abs(t - timestamp) <= FACE_BOX_TOLERANCE else None
+
+def _get_video_pool():
+    """Lazily start one process pool; each worker loads its own detector once."""
+    global _video_pool
+    if _video_pool is None:
+        # 'spawn' so TensorFlow/OpenCV state is never inherited through fork()
+        _video_pool = ProcessPoolExecutor(
+            max_workers=MAX_VIDEO_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _video_pool
+
+def _process_segment(args):
+    """Worker entry point: analyze one [start, end) frame range with a private VideoCapture"""
+    video_path, start, end, fps, policy, face_boxes = args
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return []
+        return detector._scan_frames(cap, start, end, fps, policy, face_boxes)
+    finally:
+        cap.release()
+
+def _label(result):
+    return result['emotion'] if result else None
 
 class EmotionDetector:
     def __init__(self):
@@ -32,14 +202,113 @@ class EmotionDetector:
 
         self.emotions = ['Angry', 'Disgust', 'Fear', 'Happy', 'Neutral', 'Sad', 'Surprise']
 
-    def detect(self, image_file):
-        """Detect emotion from an uploaded image file (Snapshot)"""
-        nparr = np.frombuffer(image_file.read(), np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        return self._predict_frame(frame)
+    def detect(self, image_file, face_box=None, pre_cropped=False):
+        """Detect emotion from an uploaded image file (Snapshot).
+
+        Clients that already located the face can send pre_cropped=True (the
+        image is the face) or a face_box (x, y, w, h) in original image pixels;
+        both skip the Haar cascade. A box that falls outside the image falls
+        back to server-side detection.
+        """
+        frame, scale = self._decode_snapshot(image_file)
+        if frame is None:
+            return None
+        return self._predict_frame(frame, self._client_box(frame, scale, face_box, pre_cropped))
+
+    def detect_batch(self, image_files, face_boxes=None, pre_cropped=False):
+        """Detect emotions for many snapshots with a single batched forward pass.
+
+        face_boxes, if given, is aligned with image_files (None entries allowed).
+        Returns one result (or None when no face was found) per input, in order.
+        """
+        results = [None] * len(image_files)
+        crops = []
+        owners = []
+        for i, image_file in enumerate(image_files):
+            frame, scale = self._decode_snapshot(image_file)
+            if frame is None:
+                continue
+            face_box = face_boxes[i] if face_boxes else None
+            box = self._client_box(frame, scale, face_box, pre_cropped)
+            if box is None:
+                box = self._detect_face(frame)
+            if box is None:
+                continue
+            crops.append(self._preprocess(frame, box))
+            owners.append(i)
+
+        if crops:
+            preds = self._infer(np.stack(crops))
+            for i, pred in zip(owners, preds):
+                results[i] = self._to_result(pred)
+        return results
+
+    def _client_box(self, frame, scale, face_box, pre_cropped):
+        """Face box supplied by the client, mapped onto the decoded frame (None = detect on server)"""
+        if pre_cropped:
+            # The whole frame is the client's crop: same checks as a face_box, at
+            # upload resolution; a crop that fails them is searched on the server
+            height, width = frame.shape[:2]
+            if _face_box_problem(0, 0, width / scale, height / scale) is None:
+                return (0, 0, width, height)
+            return None
+        if face_box is not None:
+            return _clip_box(face_box, frame.shape, scale)
+        return None
+
+    def _decode_snapshot(self, image_file):
+        """Size-check, read and decode an upload, at reduced resolution when it is large"""
+        stream = getattr(image_file, 'stream', image_file)
+
+        # Measure the payload without reading it
+        start = stream.tell()
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell() - start
+        stream.seek(start)
+        if size > MAX_SNAPSHOT_BYTES:
+            raise PayloadTooLarge(f"Image exceeds {MAX_SNAPSHOT_BYTES // (1024 * 1024)} MB limit")
+        if size == 0:
+            return None, 1.0
 
-    def process_video(self, video_path):
-        """Analyzes a video file frame-by-frame (1 FPS) with safety checks"""
+        # Only the header is parsed here; pixels are decoded by OpenCV below
+        flags = cv2.IMREAD_COLOR
+        scale = 1.0
+        try:
+            with Image.open(stream) as img:
+                long_side = max(img.size)
+            for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+                if long_side // factor >= SNAPSHOT_TARGET_SIDE:
+                    flags, scale = reduced_flag, 1.0 / factor
+                    break
+        except Image.DecompressionBombError:
+            # Never hand a decompression bomb to a full-resolution decode
+            raise ValueError("Image dimensions are too large")
+        except Exception:
+            pass # Unknown header: fall back to a full decode
+        stream.seek(start)
+
+        # Read straight into one preallocated buffer that NumPy wraps without copying
+        buf = bytearray(size)
+        if hasattr(stream, 'readinto'):
+            read = stream.readinto(buf)
+        else:
+            data = stream.read(size)
+            read = len(data)
+            buf[:read] = data
+        nparr = np.frombuffer(buf, np.uint8, count=read)
+        return cv2.imdecode(nparr, flags), scale
+
+    def process_video(self, video_path, workers=None, sampling=None, face_boxes=None):
+        """Analyzes a video file frame-by-frame (1 FPS by default) with safety checks.
+
+        workers > 1 splits the video into time segments analyzed in separate
+        processes (capped at MAX_VIDEO_WORKERS); None/1 keeps the single-thread path.
+        sampling is a policy from make_sampling_policy(); 'adaptive' samples
+        coarsely and only densifies where the predicted emotion changes.
+        face_boxes is a time-sorted list from parse_face_boxes(); sampled frames
+        with a nearby client box skip face detection.
+        """
+        policy = sampling or DEFAULT_SAMPLING
         cap = cv2.VideoCapture(video_path)
         
         if not cap.isOpened():
@@ -54,46 +323,192 @@ class EmotionDetector:
         if fps <= 0 or fps > 120:
             print(f"⚠️ Warning: Abnormal FPS detected ({fps}). Forcing to 30.")
             fps = 30
-            
-        frame_interval = int(fps) # Process 1 frame every second
-        if frame_interval == 0: frame_interval = 30 # Double safety
-        
-        print(f"🎬 Video Info: FPS={fps}, Total Frames={total_frames}, Interval={frame_interval}")
+
+        grid, step = self._sampling_steps(fps, policy)
         
+        print(f"🎬 Video Info: FPS={fps}, Total Frames={total_frames}, Sampling={policy['mode']}, Step={step}")
+
+        segments = self._split_segments(total_frames, fps, step, workers)
+
+        if len(segments) <= 1:
+            timeline = self._scan_frames(cap, 0, None, fps, policy, face_boxes)
+            cap.release()
+        else:
+            cap.release()
+            print(f"🧵 Parallel analysis: {len(segments)} segments")
+            jobs = [(video_path, start, end, fps, policy, face_boxes) for start, end in segments]
+            # map() yields results in submission order, and segments are
+            # contiguous, so concatenating keeps the timeline sorted by time
+            timeline = []
+            for part in _get_video_pool().map(_process_segment, jobs):
+                timeline.extend(part)
+
+        print(f"✅ Analysis Complete: {len(timeline)} timeline points.")
+        return timeline
+
+    def _sampling_steps(self, fps, policy):
+        """Return (grid, step) in frames: the finest sampling spacing and the first-pass spacing"""
+        if policy["mode"] == "adaptive":
+            grid = max(1, int(round(fps * policy["min_interval"])))
+            step = grid * max(1, int(round(policy["coarse_interval"] / policy["min_interval"])))
+            return grid, step
+
+        frame_interval = max(1, int(round(fps * policy["interval"]))) # Process 1 frame every interval
+        return frame_interval, frame_interval
+
+    def _split_segments(self, total_frames, fps, step, workers):
+        """Split [0, total_frames) into contiguous ranges aligned to the sampling step"""
+        if not workers or workers <= 1:
+            return [(0, None)]
+        # Containers without a reliable frame count (e.g. WebM) cannot be seeked safely
+        if total_frames <= 0:
+            return [(0, None)]
+
+        workers = min(workers, MAX_VIDEO_WORKERS)
+        duration = total_frames / fps
+        workers = min(workers, int(duration // MIN_SEGMENT_SECONDS))
+        if workers <= 1:
+            return [(0, None)]
+
+        # Segment boundaries fall on sampled frames so the parallel timeline
+        # is identical to the sequential one
+        samples = -(-total_frames // step)
+        per_worker = -(-samples // workers)
+        segments = []
+        for i in range(workers):
+            start = i * per_worker * step
+            if start >= total_frames:
+                break
+            end = min((i + 1) * per_worker * step, total_frames)
+            segments.append((start, end))
+        # Let the last segment run to the real end in case the frame count is short
+        segments[-1] = (segments[-1][0], None)
+        return segments
+
+    def _scan_frames(self, cap, start, end, fps, policy, face_boxes=None):
+        """Sample frames from [start, end) of an open capture according to policy"""
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+        def predict(frame_index, frame):
+            box = _nearest_box(face_boxes, frame_index / fps)
+            if box is not None:
+                box = _clip_box(box, frame.shape)
+            return self._predict_frame(frame, box)
+
+        if policy["mode"] == "adaptive":
+            return self._scan_adaptive(cap, start, end, fps, policy, predict)
+
+        frame_interval, _ = self._sampling_steps(fps, policy)
         timeline = []
-        frame_count = 0
-        analyzed_count = 0
-        
-        while True:
-            ret, frame = cap.read()
+        frame_count = start
+
+        while end is None or frame_count < end:
+            # Analyze 1 frame per interval; skipped frames are only grabbed, not retrieved
+            if frame_count % frame_interval == 0:
+                ret, frame = cap.read()
+            else:
+                ret, frame = cap.grab(), None
             if not ret:
                 break # End of video
-            
-            # Analyze 1 frame per second
-            if frame_count % frame_interval == 0:
-                result = self._predict_frame(frame)
-                timestamp = frame_count / fps
+
+            if frame is not None:
+                result = predict(frame_count, frame)
                 
                 # If face found, add to timeline
                 if result:
-                    timeline.append({
-                        "time": round(timestamp, 1),
-                        "emotion": result['emotion'],
-                        "confidence": float(f"{result['confidence']:.2f}")
-                    })
-                    analyzed_count += 1
+                    timeline.append(self._timeline_point(frame_count, fps, result))
                 else:
                     # Optional: Log 'Neutral' or 'Unknown' if face lost for a second
                     # This keeps the graph continuous even if user turns away
                     pass 
             
             frame_count += 1
-            
-        cap.release()
-        print(f"✅ Analysis Complete: Processed {analyzed_count} seconds of video.")
+
         return timeline
-    def _predict_frame(self, frame):
-        """Internal helper to detect face and predict emotion on a numpy frame"""
+
+    def _scan_adaptive(self, cap, start, end, fps, policy, predict):
+        """Single pass: predict every coarse step, refine between two coarse
+        samples only when their emotions differ.
+
+        Frames on the fine grid since the last coarse sample are kept in memory
+        (fewer than MAX_ADAPTIVE_RATIO of them), so refinement never
+        needs to seek backwards in the video.
+        """
+        grid, step = self._sampling_steps(fps, policy)
+        points = {}    # frame index -> prediction (None when no face)
+        pending = []   # (frame index, frame) on the fine grid since the last coarse sample
+        prev = None    # (frame index, prediction) of the last coarse sample
+        frame_count = start
+
+        # The frame at `end` is the next segment's first sample; it is read as
+        # the right-hand comparator so changes across the boundary are refined
+        while end is None or frame_count <= end:
+            if frame_count % grid == 0:
+                ret, frame = cap.read()
+            else:
+                ret, frame = cap.grab(), None
+            if not ret:
+                break # End of video
+
+            if frame_count % step == 0:
+                current = (frame_count, predict(frame_count, frame))
+                if prev is not None:
+                    self._refine(pending, prev, current, points, predict)
+                points[current[0]] = current[1]
+                prev, pending = current, []
+            elif frame is not None:
+                pending.append((frame_count, frame))
+            frame_count += 1
+
+        # Close the tail after the last coarse sample with the last grid frame
+        if prev is not None and pending:
+            idx, frame = pending.pop()
+            current = (idx, predict(idx, frame))
+            self._refine(pending, prev, current, points, predict)
+            points[idx] = current[1]
+
+        return [
+            self._timeline_point(idx, fps, result)
+            for idx, result in sorted(points.items())
+            if result and (end is None or idx < end)
+        ]
+
+    def _refine(self, between, left, right, points, predict):
+        """Binary-search the fine-grid frames between two samples for emotion changes"""
+        if not between or _label(left[1]) == _label(right[1]):
+            return
+        mid = len(between) // 2
+        idx, frame = between[mid]
+        current = (idx, predict(idx, frame))
+        points[idx] = current[1]
+        self._refine(between[:mid], left, current, points, predict)
+        self._refine(between[mid + 1:], current, right, points, predict)
+
+    def _timeline_point(self, frame_index, fps, result):
+        return {
+            "time": round(frame_index / fps, 1),
+            "emotion": result['emotion'],
+            "confidence": float(f"{result['confidence']:.2f}")
+        }
+
+    def _predict_frame(self, frame, box=None):
+        """Internal helper to detect face and predict emotion on a numpy frame.
+
+        A known face box skips the cascade; None runs server-side detection.
+        """
+        if box is None:
+            box = self._detect_face(frame)
+        if box is None:
+            return None
+
+        input_data = np.expand_dims(self._preprocess(frame, box), axis=0)
+        preds = self._infer(input_data)
+        return self._to_result(preds[0])
+
+    # --- Pipeline stages (kept separate so they can be timed individually) ---
+    def _detect_face(self, frame):
+        """Return the (x, y, w, h) box of the largest face, or None"""
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         faces = self.face_cascade.detectMultiScale(gray, 1.1, 5, minSize=(30, 30))
 
@@ -102,16 +517,23 @@ class EmotionDetector:
 
         # Sort to get the largest face
         faces = sorted(faces, key=lambda x: x[2] * x[3], reverse=True)
-        x, y, w, h = faces[0]
+        return faces[0]
+
+    def _preprocess(self, frame, box):
+        """Crop the face and convert it to the 224x224 RGB model input"""
+        x, y, w, h = box
         face_roi = frame[y:y+h, x:x+w]
 
         rgb_face = cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB)
-        resized = cv2.resize(rgb_face, (224, 224))
-        input_data = np.expand_dims(resized, axis=0)
+        return cv2.resize(rgb_face, (224, 224))
+
+    def _infer(self, batch):
+        """Run the model on a (N, 224, 224, 3) batch"""
+        return self.model.predict(batch, verbose=0)
 
-        preds = self.model.predict(input_data, verbose=0)
-        label_idx = np.argmax(preds)
-        confidence = float(np.max(preds))
+    def _to_result(self, pred):
+        label_idx = int(np.argmax(pred))
+        confidence = float(np.max(pred))
 
         return {
             "emotion": self.emotions[label_idx],
@@ -0,0 +1,160 @@
+# utils/friends.py
+# Friendship edge helpers (see models/Friendship.py).
+#
+# Every state change is a handful of single-document upserts/deletes on the
+# edge collection, so User documents never grow and nothing is dereferenced.
+# Membership is one lookup on the unique (user, other) index; lists are paged
+# on the (user, status, _id) index and resolved with one projected $in.
+import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from models.Friendship import Friendship
+from models.User import User
+
+FRIEND = 'friend'
+SENT = 'sent'
+RECEIVED = 'received'
+ACCEPTED = 'accepted' # send_request result: crossed with the other user's request
+FRIEND_FIELDS = ('name', 'age', 'location', 'bio', 'interests', 'status', 'avatar_seed')
+
+
+def _oid(value):
+    return value if isinstance(value, ObjectId) else ObjectId(str(value))
+
+
+def _edges():
+    return Friendship._get_collection()
+
+
+def relation(user_id, other_id):
+    """'friend' / 'sent' / 'received' from user_id's point of view, or None"""
+    edge = _edges().find_one({"user": _oid(user_id), "other": _oid(other_id)}, {"status": 1})
+    return edge["status"] if edge else None
+
+
+def relations(user_id, other_ids):
+    """{other ObjectId: status} for the given candidates, in one query"""
+    if not other_ids:
+        return {}
+    cursor = _edges().find(
+        {"user": _oid(user_id), "other": {"$in": [_oid(o) for o in other_ids]}},
+        {"other": 1, "status": 1}
+    )
+    return {edge["other"]: edge["status"] for edge in cursor}
+
+
+def are_friends(user_id, other_id):
+    return relation(user_id, other_id) == FRIEND
+
+
+def fetch_users(ids, fields=FRIEND_FIELDS):
+    """{ObjectId: raw doc} for ids in one $in query"""
+    if not ids:
+        return {}
+    return {u['_id']: u for u in User.objects(id__in=list(ids)).only(*fields).as_pymongo()}
+
+
+def edge_page(user_id, status, limit, cursor=None, fields=FRIEND_FIELDS):
+    """One page of user_id's friends / requests, oldest edge first -> (docs, next_cursor).
+
+    The cursor is the last edge's id. Edges to users that no longer exist are
+    skipped.
+    """
+    query = {"user": _oid(user_id), "status": status}
+    if cursor:
+        if not ObjectId.is_valid(cursor):
+            raise ValueError("Invalid cursor")
+        query["_id"] = {"$gt": ObjectId(cursor)}
+    edges = list(_edges().find(query, {"other": 1}).sort("_id", 1).limit(limit + 1))
+    has_more = len(edges) > limit
+    edges = edges[:limit]
+    users = fetch_users([e["other"] for e in edges], fields)
+    docs = [users[e["other"]] for e in edges if e["other"] in users]
+    return docs, (str(edges[-1]["_id"]) if has_more else None)
+
+
+def send_request(sender_id, target_id):
+    """Create a pending request; returns the existing relation instead if there is one.
+
+    Returns ACCEPTED when the target sent a request at the same moment: both
+    edges were SENT, so the two requests become a friendship.
+    """
+    sender, target = _oid(sender_id), _oid(target_id)
+    now = datetime.datetime.utcnow()
+    try:
+        result = _edges().update_one(
+            {"user": sender, "other": target},
+            {"$setOnInsert": {"status": SENT, "created_at": now, "updated_at": now}},
+            upsert=True
+        )
+    except DuplicateKeyError: # Lost a race with an identical request
+        return relation(sender, target)
+    if result.upserted_id is None:
+        return relation(sender, target)
+    try:
+        mirror = _edges().update_one(
+            {"user": target, "other": sender},
+            {"$setOnInsert": {"status": RECEIVED, "created_at": now, "updated_at": now}},
+            upsert=True
+        )
+        crossed = mirror.upserted_id is None and relation(target, sender) == SENT
+    except DuplicateKeyError: # The target's own request was inserted meanwhile
+        crossed = relation(target, sender) == SENT
+    if crossed:
+        _edges().update_many(
+            {"$or": [{"user": sender, "other": target}, {"user": target, "other": sender}]},
+            {"$set": {"status": FRIEND, "updated_at": now}}
+        )
+        return ACCEPTED
+    return None
+
+
+def accept_request(user_id, requester_id):
+    """Turn a pending request into a friendship; False if there was none"""
+    me, requester = _oid(user_id), _oid(requester_id)
+    now = datetime.datetime.utcnow()
+    result = _edges().update_one(
+        {"user": me, "other": requester, "status": RECEIVED},
+        {"$set": {"status": FRIEND, "updated_at": now}}
+    )
+    if result.matched_count == 0:
+        return False
+    _edges().update_one(
+        {"user": requester, "other": me},
+        {"$set": {"status": FRIEND, "updated_at": now}, "$setOnInsert": {"created_at": now}},
+        upsert=True
+    )
+    return True
+
+
+def reject_request(user_id, requester_id):
+    """Drop a pending request (both edges); False if there was none"""
+    me, requester = _oid(user_id), _oid(requester_id)
+    result = _edges().delete_one({"user": me, "other": requester, "status": RECEIVED})
+    _edges().delete_one({"user": requester, "other": me, "status": SENT})
+    return result.deleted_count > 0
+
+
+def remove_user_edges(user_id):
+    """Forget every relationship of a deleted account"""
+    oid = _oid(user_id)
+    _edges().delete_many({"$or": [{"user": oid}, {"other": oid}]})
+
+
+def edge_upserts(user_id, other_id, status, now):
+    """Bulk ops for one relationship (both directions); used by the migration.
+
+    Friendships overwrite pending edges; pending edges never downgrade a
+    friendship.
+    """
+    user_id, other_id = _oid(user_id), _oid(other_id)
+    mirror = {FRIEND: FRIEND, SENT: RECEIVED, RECEIVED: SENT}[status]
+    ops = []
+    for a, b, s in ((user_id, other_id, status), (other_id, user_id, mirror)):
+        if s == FRIEND:
+            update = {"$set": {"status": s, "updated_at": now}, "$setOnInsert": {"created_at": now}}
+        else:
+            update = {"$setOnInsert": {"status": s, "created_at": now, "updated_at": now}}
+        ops.append(UpdateOne({"user": a, "other": b}, update, upsert=True))
+    return ops
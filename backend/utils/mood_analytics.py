@@ -0,0 +1,157 @@
+# utils/mood_analytics.py
+# Vectorized statistics over a user's mood series (NumPy only, no per-row Python
+# work beyond building the arrays), shared by /analytics and the Gemini prompt.
+import datetime
+import numpy as np
+from models.Mood import Mood
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MOVING_AVERAGE_WINDOW = 7
+MOVING_AVERAGE_POINTS = 90 # Only the most recent points are returned
+MIN_ACTIVITY_DAYS = 3 # Activities seen on fewer days are too noisy to report
+GOOD_MOOD = 4
+
+
+def load_series(user_id, days=None):
+    """(dates datetime64[D], moods int8, activities list) sorted by date, straight from the cursor"""
+    query = {"user_id": user_id}
+    if days:
+        since = datetime.date.today() - datetime.timedelta(days=days)
+        query["date"] = {"$gte": datetime.datetime.combine(since, datetime.time())}
+    cursor = Mood._get_collection().find(query, {"_id": 0, "date": 1, "mood": 1, "activities": 1}).sort("date", 1)
+
+    dates, moods, activities = [], [], []
+    for doc in cursor:
+        dates.append(doc["date"].date())
+        moods.append(doc["mood"])
+        activities.append(doc.get("activities") or [])
+    return np.array(dates, dtype='datetime64[D]'), np.array(moods, dtype=np.int8), activities
+
+
+def _slope(x, y):
+    """Least-squares slope of y over x (mood points per day)"""
+    if len(x) < 2:
+        return 0.0
+    x = x - x.mean()
+    denom = float(x @ x)
+    return float(x @ (y - y.mean()) / denom) if denom else 0.0
+
+
+def _runs(mask):
+    """Lengths of consecutive True runs in a boolean array"""
+    if not mask.any():
+        return np.array([0])
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[1::2] - edges[::2]
+
+
+def _activity_matrix(activities):
+    """One-hot (n_days x n_activities) matrix and its vocabulary"""
+    days = [{str(a) for a in day} for day in activities]
+    vocabulary = sorted(set().union(*days)) if days else []
+    index = {a: i for i, a in enumerate(vocabulary)}
+    rows = [i for i, day in enumerate(days) for a in day]
+    cols = [index[a] for day in days for a in day]
+    matrix = np.zeros((len(activities), len(vocabulary)), dtype=np.float32)
+    matrix[rows, cols] = 1
+    return matrix, vocabulary
+
+
+def analyze(dates, moods, activities, today=None):
+    """Trend, volatility, seasonality, streaks and activity lift for one mood series"""
+    n = len(moods)
+    if n == 0:
+        return {"entries": 0}
+
+    today = np.datetime64(today or datetime.date.today(), 'D')
+    values = moods.astype(np.float64)
+    day_index = (dates - dates[0]).astype(np.int64)
+    span = int(day_index[-1]) + 1
+
+    # Calendar-aware moving average: missing days do not count toward the window
+    daily_sum = np.bincount(day_index, weights=values, minlength=span)
+    daily_count = np.bincount(day_index, minlength=span).astype(np.float64)
+    window = MOVING_AVERAGE_WINDOW
+    csum = np.concatenate(([0.0], np.cumsum(daily_sum)))
+    ccount = np.concatenate(([0.0], np.cumsum(daily_count)))
+    lo = np.maximum(np.arange(span) - window + 1, 0)
+    hi = np.arange(span) + 1
+    win_sum = csum[hi] - csum[lo]
+    win_count = ccount[hi] - ccount[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        moving = np.where(win_count > 0, win_sum / win_count, np.nan)
+    tail = moving[-MOVING_AVERAGE_POINTS:]
+    tail_start = dates[0] + (span - len(tail))
+
+    # Trend over the full range and over the last 30 days
+    recent = day_index >= day_index[-1] - 29
+    diffs = np.diff(values)
+
+    # Weekday seasonality (1970-01-01 was a Thursday, so +3 makes Monday 0)
+    weekday = (dates.astype(np.int64) + 3) % 7
+    wd_count = np.bincount(weekday, minlength=7)
+    wd_sum = np.bincount(weekday, weights=values, minlength=7)
+
+    # Streaks: consecutive logged days, and consecutive logged days with a good mood
+    logged = daily_count > 0
+    logging_runs = _runs(logged)
+    good_runs = _runs(logged & (np.bincount(day_index, weights=(values >= GOOD_MOOD), minlength=span) > 0))
+    gap_to_today = int((today - dates[-1]).astype(np.int64))
+    current_streak = int(logging_runs[-1]) if logged[-1] and gap_to_today <= 1 else 0
+
+    # Per-activity mood lift: mean mood on days with the activity minus days without
+    matrix, vocabulary = _activity_matrix(activities)
+    lifts = []
+    if vocabulary:
+        with_count = matrix.sum(axis=0)
+        with_sum = values @ matrix
+        without_count = n - with_count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            with_mean = with_sum / with_count
+            without_mean = (values.sum() - with_sum) / without_count
+        lift = np.where(without_count > 0, with_mean - without_mean, 0.0)
+        for i in np.argsort(-lift):
+            if with_count[i] < MIN_ACTIVITY_DAYS:
+                continue
+            lifts.append({
+                "activity": vocabulary[i],
+                "days": int(with_count[i]),
+                "mean_with": round(float(with_mean[i]), 2),
+                "mean_without": None if without_count[i] == 0 else round(float(without_mean[i]), 2),
+                "lift": None if without_count[i] == 0 else round(float(with_mean[i] - without_mean[i]), 2)
+            })
+
+    return {
+        "entries": n,
+        "first_date": str(dates[0]),
+        "last_date": str(dates[-1]),
+        "mean": round(float(values.mean()), 2),
+        "moving_average": {
+            "window_days": window,
+            "start_date": str(tail_start),
+            "values": [None if np.isnan(v) else round(float(v), 2) for v in tail]
+        },
+        "trend": {
+            "slope_per_day": round(_slope(day_index.astype(np.float64), values), 4),
+            "slope_per_day_last_30": round(_slope(day_index[recent].astype(np.float64), values[recent]), 4)
+        },
+        "volatility": {
+            "std": round(float(values.std()), 3),
+            "mean_abs_change": round(float(np.abs(diffs).mean()), 3) if len(diffs) else 0.0
+        },
+        "weekday": {
+            WEEKDAYS[d]: (round(float(wd_sum[d] / wd_count[d]), 2) if wd_count[d] else None)
+            for d in range(7)
+        },
+        "streaks": {
+            "current_logging": current_streak,
+            "longest_logging": int(logging_runs.max()),
+            "longest_good_mood": int(good_runs.max())
+        },
+        "activity_lift": lifts
+    }
+
+
+def user_analytics(user_id, days=None):
+    return analyze(*load_series(user_id, days))
@@ -0,0 +1,178 @@
+# utils/mood_insights.py
+# AI mood insights, cached per user and regenerated in the background.
+import datetime
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from models.Mood import Mood
+from models.MoodInsight import MoodInsight
+from utils.mood_rollups import get_rollups
+from utils.mood_analytics import user_analytics
+
+INSIGHT_WINDOW_DAYS = 30
+INSIGHT_TTL = datetime.timedelta(hours=int(os.getenv("MOOD_INSIGHT_TTL_HOURS", 24)))
+NO_DATA_MESSAGE = "No data available for the last 30 days."
+
+_client = None
+_client_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mood-insights")
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def get_genai_client():
+    """One shared Gemini client per process (None when no key is configured)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                key = os.getenv("GEMINI_API_KEY_1")
+                if not key:
+                    return None
+                from google import genai
+                _client = genai.Client(api_key=key)
+    return _client
+
+
+def load_inputs(user_id):
+    """Moods in the insight window plus a version stamp of them.
+
+    The version hashes the window start and every (date, mood, activities,
+    updated_at) in it, so any new, changed or aged-out mood changes it.
+    """
+    since = datetime.date.today() - datetime.timedelta(days=INSIGHT_WINDOW_DAYS)
+    moods = list(
+        Mood.objects(user_id=user_id, date__gte=since)
+        .order_by('date')
+        .only('date', 'mood', 'activities', 'updated_at')
+        .as_pymongo()
+    )
+    digest = hashlib.sha1(since.isoformat().encode())
+    for m in moods:
+        digest.update(repr((m['date'], m['mood'], m.get('activities'), m.get('updated_at'))).encode())
+    return digest.hexdigest(), moods
+
+
+def local_summary(values):
+    """Computed fallback when Gemini is unavailable"""
+    avg = sum(values) / len(values)
+    if avg >= 4:
+        trend = "generally positive"
+        suggestion = "Keep doing what you're doing. Maintain activities that boost mood."
+    elif avg >= 3:
+        trend = "stable"
+        suggestion = "Try adding small exercise or social time to lift mood."
+    else:
+        trend = "lower than usual"
+        suggestion = "Consider reaching out to support or booking a professional appointment."
+    return {
+        "summary": f"In the last {len(values)} recorded day(s) your average mood is {avg:.2f}.",
+        "trend": trend,
+        "suggestion": suggestion
+    }
+
+
+def build_prompt(user_id, moods):
+    payload_text = [
+        f"{m['date'].date().isoformat()}: mood={m['mood']}; activities={','.join(m.get('activities') or [])}"
+        for m in moods
+    ]
+
+    # Longer-term context from the precomputed monthly rollups (bounded document count)
+    monthly = [r.to_dict() for r in get_rollups(user_id, 'month', 6)]
+    rollup_text = [
+        f"{r['period_start'][:7]}: days={r['count']}; avg={r['average']}; min={r['min']}; max={r['max']}"
+        for r in reversed(monthly)
+    ]
+
+    # Structured statistics over the last year (trend, weekday pattern, activity lift)
+    stats = user_analytics(user_id, 365)
+    stats.pop("moving_average", None)
+
+    return f"""
+You are an empathetic mental-health assistant. Analyze the user’s last 30 days of mood logs:
+
+Each entry is:
+(date → mood level 1–5 → activities)
+{chr(10).join(payload_text)}
+
+For longer-term context, monthly aggregates (month → days logged → average → min → max):
+{chr(10).join(rollup_text)}
+
+Computed statistics for the last year (slopes are mood points per day; activity lift is
+mean mood on days with the activity minus days without):
+{json.dumps(stats, indent=1)}
+
+Please generate a rich, helpful analysis in **structured JSON** with these keys:
+
+{{
+  "summary": "One paragraph emotional analysis.",
+  "trend": "increasing | decreasing | stable | mixed",
+  "patterns": "Patterns you see between activities and mood.",
+  "possible_causes": "Possible life or emotional triggers based on data.",
+  "suggestions": "Clear, positive, actionable advice (3–5 lines).",
+  "warnings": "Gentle warnings ONLY if mood has been low consistently."
+}}
+
+Be kind, supportive, and non-judgmental.
+Keep the tone warm and human.
+"""
+
+
+def generate(user_id, version, moods):
+    """Call Gemini (or fall back locally) and store the result under `version`"""
+    try:
+        client = get_genai_client()
+        if not client:
+            raise Exception("genai client not configured")
+        response = client.models.generate_content(
+            model=os.getenv("MOOD_AI_MODEL", "gemini-2.5-flash"),
+            contents=build_prompt(user_id, moods)
+        )
+        # response.text may be available
+        insights = response.text.strip() if getattr(response, "text", None) else str(response)
+        source = 'gemini'
+    except Exception as e:
+        print("Mood insight generation fell back to local summary:", e)
+        insights = local_summary([m['mood'] for m in moods])
+        source = 'local'
+
+    MoodInsight.objects(user_id=user_id).update_one(
+        upsert=True,
+        set__version=version,
+        set__insights=insights,
+        set__source=source,
+        set__generated_at=datetime.datetime.utcnow()
+    )
+    return insights
+
+
+def is_fresh(cached, version):
+    return (
+        cached is not None
+        and cached.version == version
+        and datetime.datetime.utcnow() - cached.generated_at < INSIGHT_TTL
+    )
+
+
+def _refresh(user_id):
+    try:
+        version, moods = load_inputs(user_id)
+        if moods and not is_fresh(MoodInsight.objects(user_id=user_id).first(), version):
+            generate(user_id, version, moods)
+    except Exception as e:
+        print("❌ Background mood insight refresh failed:", e)
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(user_id)
+
+
+def schedule_refresh(user_id):
+    """Regenerate in a background thread; at most one job per user at a time"""
+    with _in_flight_lock:
+        if user_id in _in_flight:
+            return
+        _in_flight.add(user_id)
+    _executor.submit(_refresh, user_id)
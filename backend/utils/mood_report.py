@@ -0,0 +1,220 @@
+# utils/mood_report.py
+# PDF mood reports for arbitrary date ranges, rendered to disk and cached until
+# the moods they show change. Rows are streamed from a cursor, but reportlab's
+# canvas holds every finished page until save(), so render memory still grows
+# with the page count; MAX_REPORT_DAYS is what bounds it. The cache is bounded: a user keeps
+# their MAX_REPORTS_PER_USER most recently used files, and every render sweeps
+# files past REPORT_CACHE_MAX_AGE or beyond REPORT_CACHE_MAX_BYTES (LRU by mtime).
+import datetime
+import glob
+import hashlib
+import os
+import tempfile
+from models.Mood import Mood
+from models.MoodRollup import MoodRollup
+from utils.mood_rollups import period_starts
+
+REPORT_CACHE_DIR = os.getenv("MOOD_REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mindcare_reports"))
+MAX_REPORT_DAYS = 5 * 366
+MAX_REPORTS_PER_USER = 3
+REPORT_CACHE_MAX_AGE = datetime.timedelta(hours=int(os.getenv("MOOD_REPORT_CACHE_MAX_AGE_HOURS", 24)))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("MOOD_REPORT_CACHE_MAX_MB", 500)) * 2 ** 20
+# Ranges longer than this are charted by month instead of by week
+WEEKLY_CHART_MAX_DAYS = 180
+
+
+def _as_datetime(day):
+    return datetime.datetime.combine(day, datetime.time())
+
+
+def range_version(user_id, start, end):
+    """Cheap stamp of the moods in [start, end]: one aggregation, no documents returned"""
+    stats = list(Mood._get_collection().aggregate([
+        {"$match": {"user_id": user_id, "date": {"$gte": _as_datetime(start), "$lte": _as_datetime(end)}}},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "total": {"$sum": "$mood"}, "updated": {"$max": "$updated_at"}}}
+    ]))
+    stats = stats[0] if stats else {}
+    raw = f"{stats.get('count', 0)}|{stats.get('total', 0)}|{stats.get('updated')}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def iter_rows(user_id, start, end):
+    """(date, mood, activities) tuples from a server-side cursor, never a full list"""
+    cursor = Mood._get_collection().find(
+        {"user_id": user_id, "date": {"$gte": _as_datetime(start), "$lte": _as_datetime(end)}},
+        {"_id": 0, "date": 1, "mood": 1, "activities": 1}
+    ).sort("date", 1).batch_size(500)
+    for doc in cursor:
+        yield doc["date"].date(), doc["mood"], doc.get("activities") or []
+
+
+def chart_span(start, end):
+    """(period, first day, last day) of the rollup periods overlapping [start, end]"""
+    period = 'week' if (end - start).days <= WEEKLY_CHART_MAX_DAYS else 'month'
+    first = dict(period_starts(start))[period]
+    last = dict(period_starts(end))[period]
+    if period == 'week':
+        last += datetime.timedelta(days=6)
+    else:
+        last = (last + datetime.timedelta(days=31)).replace(day=1) - datetime.timedelta(days=1)
+    return period, first, last
+
+
+def chart_points(user_id, start, end):
+    """(label, average) pairs for the trend chart, from MoodRollup rather than raw moods"""
+    period, first, _ = chart_span(start, end)
+    rollups = MoodRollup.objects(
+        user_id=user_id,
+        period=period,
+        period_start__gte=first,
+        period_start__lte=end
+    ).order_by('period_start').only('period_start', 'count', 'total')
+    return period, [(r.period_start, r.total / r.count) for r in rollups if r.count]
+
+
+def render_mood_report(path, user_label, start, end, rows, chart_period, points):
+    """Render the report to `path`; rows is any iterable of (date, mood, activities)"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.graphics.charts.lineplots import LinePlot
+    from reportlab.graphics import renderPDF
+
+    c = canvas.Canvas(path, pagesize=letter)
+    width, height = letter
+
+    # Header
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(72, height - 72, f"MindCare — Mood Report ({start} to {end})")
+
+    c.setFont("Helvetica", 10)
+    c.drawString(72, height - 94, f"Generated: {datetime.datetime.now().isoformat()}")
+    c.drawString(72, height - 110, f"User: {user_label}")
+    y = height - 130
+
+    # Trend chart from precomputed weekly/monthly averages
+    if len(points) >= 2:
+        origin = points[0][0]
+        drawing = Drawing(width - 144, 170)
+        plot = LinePlot()
+        plot.x, plot.y = 30, 30
+        plot.width, plot.height = width - 204, 120
+        plot.data = [[((day - origin).days, avg) for day, avg in points]]
+        plot.lines[0].strokeWidth = 1.5
+        plot.yValueAxis.valueMin, plot.yValueAxis.valueMax, plot.yValueAxis.valueStep = 1, 5, 1
+        plot.xValueAxis.labelTextFormat = lambda v: str(origin + datetime.timedelta(days=int(v)))
+        plot.xValueAxis.labels.fontSize = 7
+        plot.xValueAxis.labels.angle = 30
+        drawing.add(plot)
+        c.setFont("Helvetica-Bold", 11)
+        c.drawString(72, y, f"Average mood by {chart_period}")
+        renderPDF.draw(drawing, c, 72, y - 180)
+        y -= 200
+
+    # Table header
+    def table_header(y):
+        c.setFont("Helvetica-Bold", 11)
+        c.drawString(72, y, "Date")
+        c.drawString(180, y, "Mood (1-5)")
+        c.drawString(260, y, "Activities")
+        c.line(72, y - 4, width - 72, y - 4)
+        c.setFont("Helvetica", 10)
+        return y - 18
+
+    y = table_header(y - 10)
+    count = total = 0
+    for day, mood, activities in rows:
+        if y < 100:
+            c.showPage()
+            y = table_header(height - 72)
+        c.drawString(72, y, str(day))
+        c.drawString(180, y, str(mood))
+        activities_str = ", ".join(str(a) for a in activities)
+        c.drawString(260, y, activities_str[:80])
+        y -= 16
+        count += 1
+        total += mood
+
+    # Simple summary, accumulated while streaming the rows
+    y -= 10
+    if y < 100:
+        c.showPage()
+        y = height - 72
+    c.setFont("Helvetica-Bold", 12)
+    if count:
+        c.drawString(72, y, f"Average mood ({count} logged days): {total / count:.2f}")
+    else:
+        c.drawString(72, y, "No mood entries found in this period.")
+
+    c.save()
+    return count
+
+
+def get_report(user_id, user_label, start, end):
+    """Path to a cached PDF for [start, end], rendering it if the moods changed"""
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    # The edge periods of the chart reach past the range: their moods count too
+    _, first, last = chart_span(start, end)
+    version = range_version(user_id, first, last)
+    prefix = os.path.join(REPORT_CACHE_DIR, f"{user_id}_{start}_{end}_")
+    path = f"{prefix}{version}.pdf"
+    if os.path.exists(path):
+        try:
+            os.utime(path) # Mark as recently used for the LRU sweeps
+            return path
+        except FileNotFoundError:
+            pass # Swept meanwhile: render again
+
+    chart_period, points = chart_points(user_id, start, end)
+    fd, tmp_path = tempfile.mkstemp(suffix=".pdf", dir=REPORT_CACHE_DIR)
+    os.close(fd)
+    try:
+        render_mood_report(tmp_path, user_label, start, end, iter_rows(user_id, start, end), chart_period, points)
+        os.replace(tmp_path, path) # Atomic: concurrent readers never see a partial file
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    # The moods changed (or this range is new): drop the user's stale and least
+    # recently used reports, then keep the whole cache within its age / size budget
+    _evict(glob.glob(os.path.join(REPORT_CACHE_DIR, f"{user_id}_*.pdf")), keep=MAX_REPORTS_PER_USER, protect=path)
+    sweep_report_cache(protect=path)
+    return path
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _by_recent_use(paths):
+    """[(mtime, size, path)] newest first; files that vanished are skipped"""
+    entries = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+    return sorted(entries, reverse=True)
+
+
+def _evict(paths, keep, protect=None):
+    """Keep the `keep` most recently used of paths (protect always counts among them)"""
+    others = [p for _, _, p in _by_recent_use(paths) if p != protect]
+    for p in others[max(keep - (protect is not None), 0):]:
+        _remove(p)
+
+
+def sweep_report_cache(protect=None):
+    """Delete cached reports older than REPORT_CACHE_MAX_AGE, then the least
+    recently used ones until the cache fits in REPORT_CACHE_MAX_BYTES."""
+    cutoff = (datetime.datetime.now() - REPORT_CACHE_MAX_AGE).timestamp()
+    total = 0
+    for mtime, size, p in _by_recent_use(glob.glob(os.path.join(REPORT_CACHE_DIR, "*.pdf"))):
+        if p != protect and (mtime < cutoff or total + size > REPORT_CACHE_MAX_BYTES):
+            _remove(p)
+        else:
+            total += size
@@ -0,0 +1,136 @@
+# utils/mood_rollups.py
+# Incremental weekly/monthly mood aggregates (see models/MoodRollup.py).
+import datetime
+from collections import defaultdict
+from pymongo import UpdateOne, ReplaceOne
+from models.Mood import Mood
+from models.MoodRollup import MoodRollup
+
+PERIODS = ('week', 'month')
+
+
+def period_starts(day):
+    """[(period, start_date)] for the rollups a mood on `day` belongs to"""
+    return [
+        ('week', day - datetime.timedelta(days=day.weekday())),
+        ('month', day.replace(day=1))
+    ]
+
+
+def _as_datetime(day):
+    # DateField values are stored as BSON datetimes
+    return datetime.datetime.combine(day, datetime.time())
+
+
+def activity_key(name):
+    """Activities become document keys, so '.', a leading '$' and '' are not allowed"""
+    key = str(name).replace('.', '_')
+    if not key:
+        return '_'
+    return '_' + key[1:] if key.startswith('$') else key
+
+
+def _deltas(old, new):
+    """$inc document for replacing mood `old` with `new`; each is (mood, activities) or None"""
+    inc = defaultdict(int)
+    for entry, sign in ((old, -1), (new, 1)):
+        if not entry:
+            continue
+        mood, activities = entry
+        inc['count'] += sign
+        inc['total'] += sign * mood
+        inc[f'mood_counts.{mood}'] += sign
+        for activity in set(activities or []):
+            inc[f'activity_counts.{activity_key(activity)}'] += sign
+    return {k: v for k, v in inc.items() if v}
+
+
+def apply_mood_change(user_id, day, old=None, new=None):
+    """Atomically apply a created (old=None) or changed mood to its week and month rollups.
+
+    One bulk_write round trip; $inc keeps concurrent updates consistent.
+    """
+    inc = _deltas(old, new)
+    if not inc:
+        return
+    now = datetime.datetime.utcnow()
+    MoodRollup._get_collection().bulk_write([
+        UpdateOne(
+            {"user_id": user_id, "period": period, "period_start": _as_datetime(start)},
+            {"$inc": inc, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for period, start in period_starts(day)
+    ], ordered=False)
+
+
+def rebuild_rollups(user_id, days=None):
+    """Recompute rollups from raw moods: for every period touched by `days`, or all of them.
+
+    Used by the backfill command and by bulk writes that bypass log_mood.
+    """
+    query = {"user_id": user_id}
+    keys = None
+    if days is not None:
+        keys = {key for day in days for key in period_starts(day)}
+        if not keys:
+            return
+        first = min(start for _, start in keys)
+        last = max(start for _, start in keys) + datetime.timedelta(days=31)
+        query["date"] = {"$gte": _as_datetime(first), "$lt": _as_datetime(last)}
+
+    buckets = {}
+    cursor = Mood._get_collection().find(query, {"mood": 1, "activities": 1, "date": 1})
+    for doc in cursor:
+        for key in period_starts(doc["date"].date()):
+            if keys is not None and key not in keys:
+                continue
+            bucket = buckets.setdefault(key, defaultdict(int))
+            for field, value in _deltas(None, (doc["mood"], doc.get("activities"))).items():
+                bucket[field] += value
+
+    collection = MoodRollup._get_collection()
+    now = datetime.datetime.utcnow()
+    ops = []
+    for (period, start), inc in buckets.items():
+        doc = {"user_id": user_id, "period": period, "period_start": _as_datetime(start),
+               "count": 0, "total": 0, "mood_counts": {}, "activity_counts": {}, "updated_at": now}
+        for field, value in inc.items():
+            if '.' in field:
+                parent, child = field.split('.', 1)
+                doc[parent][child] = value
+            else:
+                doc[field] = value
+        ops.append(ReplaceOne(
+            {"user_id": user_id, "period": period, "period_start": doc["period_start"]}, doc, upsert=True
+        ))
+
+    # Periods that no longer contain any mood
+    if keys is None:
+        collection.delete_many({"user_id": user_id, "$nor": [
+            {"period": period, "period_start": _as_datetime(start)} for period, start in buckets
+        ]} if buckets else {"user_id": user_id})
+    else:
+        for period, start in keys - set(buckets):
+            collection.delete_one({"user_id": user_id, "period": period, "period_start": _as_datetime(start)})
+
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+
+
+def bulk_upsert_moods(user_id, entries):
+    """Upsert {date: (mood, activities)} in one bulk_write; rollups must be rebuilt afterwards"""
+    now = datetime.datetime.utcnow()
+    return Mood._get_collection().bulk_write([
+        UpdateOne(
+            {"user_id": user_id, "date": _as_datetime(day)},
+            {"$set": {"mood": mood, "activities": activities, "updated_at": now}},
+            upsert=True
+        )
+        for day, (mood, activities) in entries.items()
+    ], ordered=False)
+
+
+def get_rollups(user_id, period, limit):
+    """Latest `limit` rollups for a user, newest first"""
+    return MoodRollup.objects(user_id=user_id, period=period).order_by('-period_start').limit(limit)
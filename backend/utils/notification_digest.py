@@ -0,0 +1,67 @@
+# utils/notification_digest.py
+# Coalesced message notifications: while a reader has an unread 'message'
+# notification from a sender, further messages from that sender update it in
+# place (count, preview, timestamp) instead of adding a row each.
+#
+# The partial unique index DIGEST_INDEX_NAME (one unread message digest per
+# reader and sender) makes concurrent first messages converge on one row; it is
+# created by migrate_message_digests.py, which first merges existing duplicates.
+import datetime
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from models.Notification import Notification
+
+PREVIEW_CHARS = 50
+DIGEST_INDEX_NAME = "unread_message_digest"
+DIGEST_INDEX_KEYS = [("user", 1), ("type", 1), ("metadata.sender_id", 1)]
+DIGEST_INDEX_FILTER = {"type": "message", "read": False}
+
+
+def preview(text):
+    return text[:PREVIEW_CHARS] + ('...' if len(text) > PREVIEW_CHARS else '')
+
+
+def notify_message(receiver_id, sender_id, sender_name, message_id, text):
+    """One atomic upsert per message -> (Notification, created).
+
+    `count` is the number of messages the notification stands for, so the
+    digest still says exactly how many arrived since it was last read. When two
+    first messages race, the unique digest index rejects the second insert and
+    the retry folds it into the winner's row.
+    """
+    # User text goes through $literal: in a pipeline a leading '$' would read as a field path
+    single = {"$literal": f'You have a new message from {sender_name}'}
+    several = {"$literal": f' new messages from {sender_name}'}
+    for attempt in range(2):
+        try:
+            doc = Notification._get_collection().find_one_and_update(
+                {"user": ObjectId(str(receiver_id)), "type": "message", "read": False,
+                 "metadata.sender_id": str(sender_id)},
+                [ # Pipeline update: the text depends on the incremented count
+                    {"$set": {
+                        "title": "New Message",
+                        # New digest: 1. Existing: +1 (pre-digest rows have no count but stand for one message)
+                        "count": {"$add": [
+                            {"$ifNull": ["$count", {"$cond": [{"$ifNull": ["$title", False]}, 1, 0]}]}, 1
+                        ]},
+                        "related_id": str(message_id),
+                        "timestamp": datetime.datetime.utcnow(),
+                        "metadata": {
+                            "sender_id": str(sender_id),
+                            "sender_name": {"$literal": sender_name},
+                            "message_preview": {"$literal": preview(text)}
+                        }
+                    }},
+                    {"$set": {"message": {"$cond": [
+                        {"$gt": ["$count", 1]}, {"$concat": [{"$toString": "$count"}, several]}, single
+                    ]}}}
+                ],
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            break
+        except DuplicateKeyError: # Lost the insert race: the retry matches the winner's digest
+            if attempt:
+                raise
+    return Notification._from_son(doc), doc.get("count", 1) == 1
@@ -0,0 +1,47 @@
+# utils/pagination.py
+# Shared helpers for keyset ("cursor") pagination.
+# Paginated endpoints keep returning their usual JSON body; the cursor for the
+# next page, when there is one, goes in the X-Next-Cursor response header.
+import datetime
+from bson import ObjectId
+from flask import request, jsonify
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def parse_limit(default, maximum):
+    """?limit= clamped to [1, maximum]"""
+    limit = request.args.get('limit', default=default, type=int)
+    return max(1, min(limit, maximum))
+
+
+def page(rows, limit):
+    """Split the limit + 1 rows a query fetched into (page, has_more)"""
+    return rows[:limit], len(rows) > limit
+
+
+def paginated_response(body, next_cursor=None, status=200):
+    response = jsonify(body)
+    response.status_code = status
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(next_cursor)
+    return response
+
+
+def encode_cursor(timestamp, object_id):
+    """Opaque cursor for (timestamp, _id) keyset ordering"""
+    return f"{timestamp.isoformat()}_{object_id}"
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    stamp, _, oid = cursor.rpartition('_')
+    if not ObjectId.is_valid(oid):
+        raise ValueError("Invalid cursor")
+    return datetime.datetime.fromisoformat(stamp), ObjectId(oid)
+
+
+def before_cursor(field, cursor):
+    """Mongo filter for rows strictly older than cursor in (field desc, _id desc) order"""
+    stamp, oid = decode_cursor(cursor)
+    return {"$or": [{field: {"$lt": stamp}}, {field: stamp, "_id": {"$lt": oid}}]}
@@ -0,0 +1,156 @@
+# utils/realtime.py
+# Server-sent events for Buddy Space: new messages, notifications and unread
+# counts are pushed to open streams instead of being polled.
+#
+# Route code publishes to topics ("user:<id>", "group:<id>") on a broker. The
+# default LocalBroker fans out in-process, which is all a single worker needs.
+# With several worker processes set REALTIME_BROKER_URL=redis://... so every
+# process relays every publish to its own local subscribers (needs `redis`).
+import json
+import os
+import queue
+import threading
+
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 256 # Events buffered per stream before it is considered dead
+
+
+def user_topic(user_id):
+    return f"user:{user_id}"
+
+
+def group_topic(group_id):
+    return f"group:{group_id}"
+
+
+class Subscription:
+    def __init__(self, broker, topics):
+        self.broker = broker
+        self.topics = tuple(topics)
+        self.events = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # Slow or vanished client: drop the stream rather than buffer forever
+            self.overflowed = True
+
+    def get(self, timeout):
+        return self.events.get(timeout=timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process topic fan-out; also the delivery half of the Redis broker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = {}
+
+    def subscribe(self, topics):
+        sub = Subscription(self, topics)
+        with self._lock:
+            for topic in sub.topics:
+                self._topics.setdefault(topic, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for topic in sub.topics:
+                subs = self._topics.get(topic)
+                if subs:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._topics[topic]
+
+    def has_subscribers(self, topic):
+        return topic in self._topics
+
+    def connection_count(self):
+        with self._lock:
+            return len({sub for subs in self._topics.values() for sub in subs})
+
+    def publish(self, topic, event, data):
+        self._fan_out(topic, {"event": event, "data": data})
+
+    def _fan_out(self, topic, message):
+        with self._lock:
+            subs = list(self._topics.get(topic, ()))
+        for sub in subs:
+            sub.deliver(message)
+
+
+class RedisBroker(LocalBroker):
+    """Publishes through Redis; one listener thread per process delivers locally"""
+
+    CHANNEL_PREFIX = "sahara:"
+
+    def __init__(self, url):
+        super().__init__()
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(self.CHANNEL_PREFIX + "*")
+        threading.Thread(target=self._listen, name="realtime-redis", daemon=True).start()
+
+    def has_subscribers(self, topic):
+        return True # Listeners may live in another process
+
+    def publish(self, topic, event, data):
+        payload = json.dumps({"event": event, "data": data}, default=str)
+        self._redis.publish(self.CHANNEL_PREFIX + topic, payload)
+
+    def _listen(self):
+        for item in self._pubsub.listen():
+            try:
+                topic = item["channel"].decode()[len(self.CHANNEL_PREFIX):]
+                self._fan_out(topic, json.loads(item["data"]))
+            except Exception as e:
+                print("⚠️ Realtime relay error:", e)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = os.getenv("REALTIME_BROKER_URL")
+                _broker = RedisBroker(url) if url else LocalBroker()
+    return _broker
+
+
+def publish(topic, event, data):
+    """Fire-and-forget; a broker failure must never fail the request that published"""
+    try:
+        get_broker().publish(topic, event, data)
+    except Exception as e:
+        print(f"⚠️ Realtime publish to {topic} failed:", e)
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def event_stream(subscription, initial=(), heartbeat=HEARTBEAT_SECONDS):
+    """SSE body: `initial` events, then broker events, with comment heartbeats
+    so proxies keep the connection open and dead clients are noticed."""
+    try:
+        for event, data in initial:
+            yield format_event(event, data)
+        while not subscription.overflowed:
+            try:
+                message = subscription.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            yield format_event(message["event"], message["data"])
+    finally:
+        subscription.close()
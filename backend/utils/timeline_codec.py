@@ -0,0 +1,129 @@
+# utils/timeline_codec.py
+# Compact storage for video-journal timelines.
+#
+# A timeline point is {"time": 12.5, "emotion": "Happy", "confidence": 0.87}.
+# Instead of one dict per point we store:
+#   t    -> uint32 deciseconds, packed little-endian bytes
+#   c    -> uint8 confidence percent, packed bytes
+#   runs -> [[emotion_code, run_length], ...] (run-length encoded emotions)
+# Times are already rounded to 0.1s and confidences to 0.01 by the detector,
+# so the round trip is lossless.
+import sys
+from array import array
+
+# Same order as EmotionDetector.emotions
+EMOTIONS = ['Angry', 'Disgust', 'Fear', 'Happy', 'Neutral', 'Sad', 'Surprise']
+EMOTION_CODES = {name: code for code, name in enumerate(EMOTIONS)}
+FORMAT_VERSION = 1
+
+
+def _pack(typecode, values):
+    arr = array(typecode, values)
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _unpack(typecode, data):
+    arr = array(typecode)
+    arr.frombytes(bytes(data))
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr
+
+
+def encode_timeline(timeline):
+    """List of timeline dicts -> compact dict (raises ValueError on unknown emotions)"""
+    runs = []
+    for point in timeline:
+        code = EMOTION_CODES.get(point['emotion'])
+        if code is None:
+            raise ValueError(f"Unknown emotion: {point['emotion']}")
+        if runs and runs[-1][0] == code:
+            runs[-1][1] += 1
+        else:
+            runs.append([code, 1])
+
+    return {
+        "v": FORMAT_VERSION,
+        "n": len(timeline),
+        "t": _pack('I', (int(round(p['time'] * 10)) for p in timeline)),
+        "c": _pack('B', (int(round(p.get('confidence', 0) * 100)) for p in timeline)),
+        "runs": runs
+    }
+
+
+def decode_timeline(compact):
+    """Compact dict -> list of timeline dicts (the API shape)"""
+    if not compact:
+        return []
+    times = _unpack('I', compact["t"])
+    confidences = _unpack('B', compact["c"])
+
+    timeline = []
+    i = 0
+    for code, length in compact["runs"]:
+        emotion = EMOTIONS[code]
+        for _ in range(length):
+            timeline.append({
+                "time": times[i] / 10,
+                "emotion": emotion,
+                "confidence": confidences[i] / 100
+            })
+            i += 1
+    return timeline
+
+
+def emotion_counts(compact, lo=0, hi=None):
+    """Per-emotion point counts for points [lo, hi), walking the runs once"""
+    counts = [0] * len(EMOTIONS)
+    if hi is None:
+        hi = compact["n"]
+    pos = 0
+    for code, length in compact["runs"]:
+        if pos >= hi:
+            break
+        overlap = min(pos + length, hi) - max(pos, lo)
+        if overlap > 0:
+            counts[code] += overlap
+        pos += length
+    return counts
+
+
+def dominant_emotion(compact, lo=0, hi=None, default="Neutral"):
+    """Most frequent emotion in points [lo, hi); ties go to the lower emotion code"""
+    counts = emotion_counts(compact, lo, hi)
+    best = max(range(len(counts)), key=counts.__getitem__)
+    return EMOTIONS[best] if counts[best] else default
+
+
+def average_confidence(compact):
+    confidences = _unpack('B', compact["c"])
+    return sum(confidences) / (100 * len(confidences)) if confidences else 0
+
+
+def downsample(compact, points):
+    """At most `points` evenly spaced timeline points (API shape) for sparklines.
+
+    Only the selected points are materialized; runs are walked once.
+    """
+    n = compact["n"] if compact else 0
+    if n == 0 or points <= 0:
+        return []
+    if points >= n:
+        return decode_timeline(compact)
+
+    times = _unpack('I', compact["t"])
+    confidences = _unpack('B', compact["c"])
+    wanted = [round(i * (n - 1) / (points - 1)) for i in range(points)] if points > 1 else [0]
+
+    out = []
+    pos = 0
+    j = 0
+    for code, length in compact["runs"]:
+        while j < len(wanted) and wanted[j] < pos + length:
+            i = wanted[j]
+            out.append({"time": times[i] / 10, "emotion": EMOTIONS[code], "confidence": confidences[i] / 100})
+            j += 1
+        pos += length
+    return out
@@ -0,0 +1,84 @@
+# utils/unread_counters.py
+# Unread notification / private message totals per user.
+#
+# Writers adjust the counter with one atomic $inc next to the write they make
+# (+1 on create, -modified_count on mark-read), so reading the badge is a single
+# _id lookup instead of count() over the source collections. A counter is only
+# ever created by reconcile(), which recounts from source, so unread items from
+# before it existed are never lost. reconcile() also runs on detected drift
+# (a negative total) and from reconcile_unread_counters.py.
+import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from models.UnreadCounter import UnreadCounter
+from models.Notification import Notification
+from models.PrivateMessage import PrivateMessage
+
+FIELDS = ('notifications', 'messages')
+
+
+def _oid(value):
+    return value if isinstance(value, ObjectId) else ObjectId(str(value))
+
+
+def bump(user_id, notifications=0, messages=0):
+    """Atomically add to a user's counters (negative to decrement).
+
+    Call after the source write. Without a counter yet, the user is recounted
+    instead, which already includes that write.
+    """
+    if not notifications and not messages:
+        return
+    result = UnreadCounter._get_collection().update_one(
+        {"_id": _oid(user_id)},
+        {"$inc": {"notifications": notifications, "messages": messages},
+         "$set": {"updated_at": datetime.datetime.utcnow()}}
+    )
+    if result.matched_count == 0:
+        reconcile([_oid(user_id)])
+
+
+def get_counts(user_id):
+    """{'notifications': n, 'messages': m}; recounted for users without a counter or with drift"""
+    doc = UnreadCounter._get_collection().find_one({"_id": _oid(user_id)}, {f: 1 for f in FIELDS})
+    if doc is None:
+        return reconcile([_oid(user_id)])[_oid(user_id)]
+    counts = {f: doc.get(f, 0) for f in FIELDS}
+    if any(v < 0 for v in counts.values()):
+        print(f"⚠️ Unread counter drift for user {user_id}: {counts}; recounting")
+        return reconcile([_oid(user_id)])[_oid(user_id)]
+    return counts
+
+
+def _unread_by_user(collection, user_field, user_ids):
+    match = {"read": False}
+    if user_ids is not None:
+        match[user_field] = {"$in": user_ids}
+    pipeline = [{"$match": match}, {"$group": {"_id": f"${user_field}", "n": {"$sum": 1}}}]
+    return {row["_id"]: row["n"] for row in collection.aggregate(pipeline)}
+
+
+def reconcile(user_ids=None):
+    """Recount from Notification / PrivateMessage and overwrite the counters.
+
+    user_ids=None recounts everyone who has a counter or anything unread.
+    Returns {user ObjectId: counts}.
+    """
+    notifications = _unread_by_user(Notification._get_collection(), "user", user_ids)
+    messages = _unread_by_user(PrivateMessage._get_collection(), "receiver", user_ids)
+
+    counters = UnreadCounter._get_collection()
+    if user_ids is None:
+        users = set(notifications) | set(messages) | set(counters.distinct("_id"))
+    else:
+        users = set(user_ids)
+
+    now = datetime.datetime.utcnow()
+    totals = {uid: {"notifications": notifications.get(uid, 0), "messages": messages.get(uid, 0)} for uid in users}
+    ops = [
+        UpdateOne({"_id": uid}, {"$set": dict(counts, updated_at=now, reconciled_at=now)}, upsert=True)
+        for uid, counts in totals.items()
+    ]
+    if ops:
+        counters.bulk_write(ops, ordered=False)
+    return totals
@@ -27,6 +27,7 @@ export default function NotificationPage() {
   const [notifications, setNotifications] = useState<Notification[]>([]);
   const [unreadCount, setUnreadCount] = useState(0);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null); // X-Next-Cursor: `before` of the next older page
   const navigate = useNavigate();
 
   const getToken = (): string | null => {
@@ -38,10 +39,12 @@ export default function NotificationPage() {
     fetchUnreadCount();
   }, []);
 
-  const fetchNotifications = async () => {
+  // Newest page first; pass `before` to append the next older page
+  const fetchNotifications = async (before?: string) => {
     try {
       const token = getToken();
-      const res = await fetch(`${API_URL}/notifications`, {
+      const query = before ? `?before=${encodeURIComponent(before)}` : '';
+      const res = await fetch(`${API_URL}/notifications${query}`, {
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json'
@@ -50,7 +53,8 @@ export default function NotificationPage() {
 
       if (res.ok) {
         const data = await res.json();
-        setNotifications(data);
+        setNotifications(prev => before ? [...prev, ...data] : data);
+        setNextCursor(res.headers.get('X-Next-Cursor'));
       }
     } catch (err) {
       console.error('Error fetching notifications:', err);
@@ -321,6 +325,13 @@ export default function NotificationPage() {
                   </div>
                 </div>
               ))}
+              {nextCursor && (
+                <div className="text-center">
+                  <Button variant="ghost" size="sm" onClick={() => fetchNotifications(nextCursor)}>
+                    Load more
+                  </Button>
+                </div>
+              )}
             </div>
           )}
         </CardContent>
@@ -40,7 +40,17 @@ export default function VideoJournal() {
   };
 
   // --- Handle Viewing Past Entry (Opens Modal) ---
-  const handleViewEntry = (entry: any) => {
+  const handleViewEntry = async (summary: any) => {
+    // 0. History only lists summaries; load the full entry (timeline + transcript)
+    let entry;
+    try {
+        const res = await fetch(`http://localhost:5000/api/moods/journal/${summary.id}`, {
+            headers: { "Authorization": "Bearer " + localStorage.getItem("mindcare-token") }
+        });
+        if (!res.ok) return;
+        entry = await res.json();
+    } catch (err) { console.error("Failed to load entry:", err); return; }
+
     // 1. Reconstruct Chart Data from the timeline
     const chartData = entry.timeline.map((t: any) => ({
         time: `${t.time}s`,
@@ -32,13 +32,18 @@ const getGroupColor = (name: string) => {
 export default function BuddySpace() {
   // --- STATE MANAGEMENT ---
   const [buddies, setBuddies] = useState<any[]>([]);
+  const [buddiesCursor, setBuddiesCursor] = useState<string | null>(null); // X-Next-Cursor of the last loaded page
   const [friends, setFriends] = useState<any[]>([]);
   const [friendRequests, setFriendRequests] = useState<any[]>([]);
+  const [friendsCursor, setFriendsCursor] = useState<string | null>(null);
+  const [requestsCursor, setRequestsCursor] = useState<string | null>(null);
   const [groupChats, setGroupChats] = useState<any[]>([]);
   
   // Chat State
   const [chatMessages, setChatMessages] = useState<any[]>([]);
   const [privateMessages, setPrivateMessages] = useState<any[]>([]);
+  const [chatCursor, setChatCursor] = useState<string | null>(null); // X-Next-Cursor of the oldest loaded page
+  const [privateCursor, setPrivateCursor] = useState<string | null>(null);
   const [selectedChat, setSelectedChat] = useState<string | null>(null); // Group ID
   const [selectedPrivateChat, setSelectedPrivateChat] = useState<string | null>(null); // Friend ID
   const [newMessage, setNewMessage] = useState('');
@@ -72,26 +77,70 @@ export default function BuddySpace() {
     initializeData();
   }, []);
 
+  // Follow new messages at the bottom, but stay put when older pages are prepended
+  const lastChatId = chatMessages[chatMessages.length - 1]?.id;
+  const lastPrivateId = privateMessages[privateMessages.length - 1]?.id;
   useEffect(() => {
     if (scrollRef.current) {
         scrollRef.current.scrollIntoView({ behavior: "smooth" });
     }
-  }, [chatMessages, privateMessages]);
+  }, [lastChatId, lastPrivateId]);
+
+  // --- REAL-TIME UPDATES (server push instead of polling) ---
+  useEffect(() => {
+    if (!token) return;
+    const me = JSON.parse(localStorage.getItem('mindcare-user') || '{}');
+    const params = new URLSearchParams({ jwt: token });
+    if (selectedChat) params.set('groups', selectedChat);
+    const source = new EventSource(`${API_URL}/stream?${params}`);
+
+    source.addEventListener('counts', (e) => {
+      setUnreadCount(JSON.parse((e as MessageEvent).data).notifications);
+    });
+    source.addEventListener('group_message', (e) => {
+      const msg = JSON.parse((e as MessageEvent).data);
+      if (msg.groupId !== selectedChat) return;
+      setChatMessages(prev => prev.some(m => m.id === msg.id) ? prev : [...prev, { ...msg, isCurrentUser: msg.authorId === me.id }]);
+    });
+    source.addEventListener('private_message', (e) => {
+      const msg = JSON.parse((e as MessageEvent).data);
+      if (msg.sender !== selectedPrivateChat) return;
+      setPrivateMessages(prev => prev.some(m => m.id === msg.id) ? prev : [...prev, msg]);
+    });
+    source.addEventListener('notification', (e) => {
+      if (JSON.parse((e as MessageEvent).data).type === 'friend_request') fetchFriendRequests();
+    });
+
+    return () => source.close();
+  }, [token, selectedChat, selectedPrivateChat]);
 
   // --- API CALLS ---
-  const fetchBuddies = async () => {
-    const res = await fetch(`${API_URL}/buddies`, { headers: { 'Authorization': `Bearer ${token}` } });
-    if (res.ok) setBuddies(await res.json());
+  // Ranked best match first; pass `cursor` (the X-Next-Cursor header) to append the next page
+  const fetchBuddies = async (cursor?: string) => {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const res = await fetch(`${API_URL}/buddies${query}`, { headers: { 'Authorization': `Bearer ${token}` } });
+    if (!res.ok) return;
+    const page = await res.json();
+    setBuddies(prev => cursor ? [...prev, ...page] : page);
+    setBuddiesCursor(res.headers.get('X-Next-Cursor'));
   };
 
-  const fetchFriends = async () => {
-    const res = await fetch(`${API_URL}/friends`, { headers: { 'Authorization': `Bearer ${token}` } });
-    if (res.ok) setFriends(await res.json());
+  const fetchFriends = async (cursor?: string) => {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const res = await fetch(`${API_URL}/friends${query}`, { headers: { 'Authorization': `Bearer ${token}` } });
+    if (!res.ok) return;
+    const page = await res.json();
+    setFriends(prev => cursor ? [...prev, ...page] : page);
+    setFriendsCursor(res.headers.get('X-Next-Cursor'));
   };
 
-  const fetchFriendRequests = async () => {
-    const res = await fetch(`${API_URL}/friend-requests`, { headers: { 'Authorization': `Bearer ${token}` } });
-    if (res.ok) setFriendRequests(await res.json());
+  const fetchFriendRequests = async (cursor?: string) => {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const res = await fetch(`${API_URL}/friend-requests${query}`, { headers: { 'Authorization': `Bearer ${token}` } });
+    if (!res.ok) return;
+    const page = await res.json();
+    setFriendRequests(prev => cursor ? [...prev, ...page] : page);
+    setRequestsCursor(res.headers.get('X-Next-Cursor'));
   };
 
   const fetchGroupChats = async () => {
@@ -111,14 +160,23 @@ export default function BuddySpace() {
     } catch (err) { console.error(err); }
   };
 
-  const fetchMessages = async (groupId: string) => {
-    const res = await fetch(`${API_URL}/messages/${groupId}`, { headers: { 'Authorization': `Bearer ${token}` } });
-    if (res.ok) setChatMessages(await res.json());
+  // History is paged newest first; pass `before` (the X-Next-Cursor header) to prepend the next older page
+  const fetchMessages = async (groupId: string, before?: string) => {
+    const query = before ? `?before=${encodeURIComponent(before)}` : '';
+    const res = await fetch(`${API_URL}/messages/${groupId}${query}`, { headers: { 'Authorization': `Bearer ${token}` } });
+    if (!res.ok) return;
+    const page = await res.json();
+    setChatMessages(prev => before ? [...page, ...prev] : page);
+    setChatCursor(res.headers.get('X-Next-Cursor'));
   };
 
-  const fetchPrivateMessages = async (friendId: string) => {
-    const res = await fetch(`${API_URL}/private-messages/${friendId}`, { headers: { 'Authorization': `Bearer ${token}` } });
-    if (res.ok) setPrivateMessages(await res.json());
+  const fetchPrivateMessages = async (friendId: string, before?: string) => {
+    const query = before ? `?before=${encodeURIComponent(before)}` : '';
+    const res = await fetch(`${API_URL}/private-messages/${friendId}${query}`, { headers: { 'Authorization': `Bearer ${token}` } });
+    if (!res.ok) return;
+    const page = await res.json();
+    setPrivateMessages(prev => before ? [...page, ...prev] : page);
+    setPrivateCursor(res.headers.get('X-Next-Cursor'));
   };
 
   // --- ACTIONS ---
@@ -253,6 +311,11 @@ export default function BuddySpace() {
                         <p>No messages yet. Say hello! 👋</p>
                     </div>
                 )}
+                {privateCursor && (
+                    <div className="text-center">
+                        <Button variant="ghost" size="sm" onClick={() => fetchPrivateMessages(selectedPrivateChat, privateCursor)}>Load older messages</Button>
+                    </div>
+                )}
                 {privateMessages.map((msg) => (
                     <div key={msg.id} className={`flex ${msg.isCurrentUser ? 'justify-end' : 'justify-start'}`}>
                         <div className={`max-w-[70%] px-4 py-2 rounded-2xl shadow-sm ${
@@ -317,6 +380,11 @@ export default function BuddySpace() {
                         <p>Welcome to {group?.name}! Start the conversation.</p>
                     </div>
                 )}
+                {chatCursor && (
+                    <div className="text-center">
+                        <Button variant="ghost" size="sm" onClick={() => fetchMessages(selectedChat, chatCursor)}>Load older messages</Button>
+                    </div>
+                )}
                 {chatMessages.map((msg) => (
                     <div key={msg.id} className={`flex flex-col ${msg.isCurrentUser ? 'items-end' : 'items-start'}`}>
                         {!msg.isCurrentUser && <span className="text-xs text-muted-foreground ml-2 mb-1">{msg.author}</span>}
@@ -369,7 +437,7 @@ export default function BuddySpace() {
             <Button variant="outline" onClick={() => setShowFriendRequests(true)} className="relative border-indigo-200 hover:bg-indigo-50 hover:text-indigo-700">
                 <Bell className="w-4 h-4 mr-2" />
                 Requests
-                {friendRequests.length > 0 && <Badge className="ml-2 bg-indigo-600 text-white">{friendRequests.length}</Badge>}
+                {friendRequests.length > 0 && <Badge className="ml-2 bg-indigo-600 text-white">{friendRequests.length}{requestsCursor && '+'}</Badge>}
             </Button>
             <div className="flex items-center gap-2 bg-white dark:bg-zinc-900 p-2 rounded-lg border border-indigo-100 shadow-sm">
                 <Lock className="w-4 h-4 text-indigo-600" />
@@ -464,6 +532,12 @@ export default function BuddySpace() {
                     ))}
                 </div>
             )}
+            {/* Search only covers the buddies loaded so far */}
+            {!loading && buddiesCursor && (
+                <div className="text-center">
+                    <Button variant="outline" onClick={() => fetchBuddies(buddiesCursor)}>Load more buddies</Button>
+                </div>
+            )}
         </TabsContent>
 
         {/* 2. FRIENDS TAB */}
@@ -498,6 +572,11 @@ export default function BuddySpace() {
                      ))}
                  </div>
              )}
+             {friendsCursor && (
+                 <div className="text-center">
+                     <Button variant="outline" onClick={() => fetchFriends(friendsCursor)}>Load more friends</Button>
+                 </div>
+             )}
         </TabsContent>
 
         {/* 3. GROUPS TAB */}
@@ -554,6 +633,11 @@ export default function BuddySpace() {
                          </div>
                      </div>
                  ))}
+                 {requestsCursor && (
+                     <div className="text-center">
+                         <Button variant="ghost" size="sm" onClick={() => fetchFriendRequests(requestsCursor)}>Load more requests</Button>
+                     </div>
+                 )}
              </div>
           )}
         </DialogContent>
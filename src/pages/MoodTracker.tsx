@@ -65,16 +65,24 @@ const [insightsJson, setInsightsJson] = useState<any>(null);
 useEffect(() => {
     const fetchMoods = async () => {
       try {
-        const res = await fetch("http://localhost:5000/api/moods/", {
-          headers: {
-            Authorization: "Bearer " + localStorage.getItem("mindcare-token"),
-          },
-        });
-
-        const data = await res.json();
-
-        // 1. Set FULL history for the Heatmap & AI Insights
-        setMonthlyMoods(data);
+        // The API pages newest first: follow X-Next-Cursor (?before=) until the history is complete
+        let data: any[] = [];
+        let before: string | null = null;
+        do {
+          const query = new URLSearchParams({ limit: "1000" });
+          if (before) query.set("before", before);
+          const res = await fetch(`http://localhost:5000/api/moods/?${query}`, {
+            headers: {
+              Authorization: "Bearer " + localStorage.getItem("mindcare-token"),
+            },
+          });
+          if (!res.ok) break;
+          data = [...data, ...(await res.json())];
+          before = res.headers.get("X-Next-Cursor");
+
+          // 1. Set FULL history for the Heatmap & AI Insights (grows as older pages arrive)
+          setMonthlyMoods(data);
+        } while (before);
 
         // 2. Filter ONLY current week for the Trend Chart
         const currentWeekData = data.filter((item: any) => isInCurrentWeek(item.date));